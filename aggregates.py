@@ -0,0 +1,268 @@
+import json
+import sqlite3
+import logging
+
+import numpy as np
+import pandas as pd
+
+from analysis import SkillAggregates, SkillIndex, sort_counts, sorted_counter
+from profiler import profiled
+
+# 增量维护的分析聚合状态：
+# 各岗位类别、各 (岗位类别, 技能) 的岗位数、薪资总和、薪资平方和等可加的统计量，以及技能共现岗位数，
+# 新增岗位时加上这些岗位的统计量，删除岗位时减去，不需要从全部历史数据重新计算
+# 状态保存在SQLite文件中：聚合表较小，每次整体写入；岗位台账（每个已计入岗位的指纹和它贡献的字段）只写入变化的行，
+# 删除岗位时从台账取出它当初贡献的值来撤销
+# update(df) 用岗位指纹比较 df 与台账，只对新增和删除的岗位做聚合；
+# 调用方已知新增和删除的岗位时用 update(added=..., removed=...)，不必对全部数据计算指纹，
+# 增量爬取引起的变化由 aggregate_delta 计算（Main.run_preprocess 传入 crawl_delta 时返回）
+
+# 计算岗位指纹的列（存在的列），任何一列变化都视为删除旧岗位、新增新岗位
+FINGERPRINT_COLUMNS = ['岗位名称', '公司名称', '公司类型', '薪资范围', '技能要求', '数据来源', '详情页URL',
+                       '岗位类别', '平均薪资', '岗位描述']
+
+CATEGORY_STAT_COLUMNS = ['岗位数', '薪资岗位数', '薪资总和', '薪资平方和']
+SKILL_STAT_COLUMNS = ['出现次数', '岗位数', '薪资总和', '薪资岗位数', '薪资平方和']
+
+
+def row_fingerprints(df):
+    """每行岗位的64位指纹（int64）；完全相同的行按出现顺序区分，各自计入一次"""
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+    # 缺失值统一为空字符串，CSV读回的NaN和爬取时的空字符串得到相同的指纹
+    values = df[columns].astype(object).fillna('').astype(str)
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    keyed = pd.DataFrame({'hash': hashes, 'occurrence': occurrence})
+    return pd.util.hash_pandas_object(keyed, index=False).to_numpy().view(np.int64)
+
+
+def _empty_frame(index_names, columns):
+    index = pd.MultiIndex.from_arrays([[] for _ in index_names], names=index_names) if len(index_names) > 1 \
+        else pd.Index([], name=index_names[0], dtype=object)
+    return pd.DataFrame({column: pd.Series([], dtype=float) for column in columns}, index=index)
+
+
+# 一批岗位的可加统计量：(类别统计, 类别×技能统计, 技能共现岗位数)
+def _partial_aggregates(df):
+    salary = np.asarray(df['平均薪资'], dtype=float)
+    frame = pd.DataFrame({'岗位类别': np.asarray(df['岗位类别'], dtype=object), '薪资': salary,
+                          '薪资平方': salary ** 2})
+    categories = frame.groupby('岗位类别', sort=False).agg(
+        岗位数=('薪资', 'size'),
+        薪资岗位数=('薪资', 'count'),
+        薪资总和=('薪资', 'sum'),
+        薪资平方和=('薪资平方', 'sum')
+    ).astype(float)
+
+    skill_index = SkillIndex(df['技能列表'])
+    category_skills = SkillAggregates(df, skill_index=skill_index).by_category.astype(float)
+
+    # 技能共现按技能名排序成 (技能A<技能B)，不同批次的结果可以直接相加
+    pairs = skill_index.cooccurrence()
+    first = np.where(pairs['技能A'] < pairs['技能B'], pairs['技能A'], pairs['技能B'])
+    second = np.where(pairs['技能A'] < pairs['技能B'], pairs['技能B'], pairs['技能A'])
+    cooccurrence = pd.Series(pairs['共现岗位数'].to_numpy(dtype=float),
+                             index=pd.MultiIndex.from_arrays([first, second], names=['技能A', '技能B']),
+                             name='共现岗位数')
+    return categories, category_skills, cooccurrence
+
+
+def _combine(total, delta, sign, count_column):
+    """total + sign*delta，去掉计数减到0的行"""
+    combined = total.add(delta * sign, fill_value=0)
+    counts = combined[count_column] if isinstance(combined, pd.DataFrame) else combined
+    return combined[counts.round() > 0]
+
+
+# 一次增量爬取引起的聚合状态变化，返回 (新增的岗位, 删除岗位的指纹)，供 AggregateState.update(added=..., removed=...) 使用
+# raw_df: 去重前的全部原始数据；new_rows: raw_df 中本次爬取的行（布尔数组）；replaced: 爬取时被同一岗位的新数据替换掉的旧原始行
+# canonical: 去重后保留的行在 raw_df 中的位置，与 processed_df 的行一一对应；clusters: dedup_postings 的簇映射（None为未去重）
+# 与新岗位同簇的旧岗位可能是之前计入的保留行，一律按删除处理，这些簇现在保留的行按新增处理；
+# 旧岗位只需重新预处理（不提取描述技能）得到指纹，不在台账中的指纹撤销时会被忽略
+def aggregate_delta(raw_df, new_rows, replaced, canonical, clusters, processed_df):
+    from preprocess import preprocess_data
+
+    new_rows = np.asarray(new_rows, dtype=bool)
+    if clusters is None:
+        affected = new_rows
+    else:
+        cluster_ids = clusters['簇ID'].to_numpy()
+        affected = np.isin(cluster_ids, cluster_ids[new_rows])
+    kept = np.zeros(len(raw_df), dtype=bool)
+    kept[canonical] = True
+    added = processed_df[affected[canonical]].reset_index(drop=True)
+
+    stale = [frame for frame in (raw_df[affected & ~new_rows & ~kept], replaced) if len(frame)]
+    if not stale:
+        return added, np.empty(0, dtype=np.int64)
+    stale = preprocess_data(pd.concat(stale, ignore_index=True), skill_extraction=False)
+    return added, row_fingerprints(stale)
+
+
+# 增量维护的分析聚合状态，提供与 analysis.SkillAggregates 相同的查询接口，可直接传给 analyze_data
+# path: SQLite状态文件，None时只保存在内存中
+class AggregateState:
+    def __init__(self, path=None):
+        self.path = path
+        self.skill_index = None
+        self._conn = sqlite3.connect(path or ':memory:')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS ledger '
+                           '(key INTEGER PRIMARY KEY, category TEXT, salary REAL, skills TEXT)')
+        self.categories = self._read_table('categories', ['岗位类别'], CATEGORY_STAT_COLUMNS)
+        self.by_category = self._read_table('category_skills', ['岗位类别', '技能'], SKILL_STAT_COLUMNS)
+        self.skill_pairs = self._read_table('cooccurrence', ['技能A', '技能B'], ['共现岗位数'])['共现岗位数']
+
+    def _read_table(self, table, index_names, columns):
+        exists = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+        if not exists:
+            return _empty_frame(index_names, columns)
+        frame = pd.read_sql_query(f'SELECT * FROM "{table}"', self._conn)
+        return frame.set_index(index_names)[columns].astype(float)
+
+    @property
+    def by_skill(self):
+        return self.by_category.groupby(level='技能', sort=False).sum()
+
+    def __len__(self):
+        return int(round(self.categories['岗位数'].sum()))
+
+    def keys(self):
+        """已计入的所有岗位指纹"""
+        return np.fromiter((key for key, in self._conn.execute('SELECT key FROM ledger')), dtype=np.int64)
+
+    def _apply(self, df, sign):
+        if len(df) == 0:
+            return
+        categories, category_skills, cooccurrence = _partial_aggregates(df)
+        self.categories = _combine(self.categories, categories, sign, '岗位数')
+        self.by_category = _combine(self.by_category, category_skills, sign, '岗位数')
+        self.skill_pairs = _combine(self.skill_pairs, cooccurrence, sign, None)
+
+    def add(self, df, keys=None):
+        """计入新岗位（df 为预处理后的数据），已计入的岗位（指纹相同）会被跳过；返回实际计入的岗位数"""
+        keys = row_fingerprints(df) if keys is None else np.asarray(keys, dtype=np.int64)
+        self._stage_keys(keys)
+        known = np.fromiter((key for key, in self._conn.execute('SELECT key FROM ledger JOIN staged_keys USING (key)')),
+                            dtype=np.int64)
+        new = ~np.isin(keys, known)
+        return self._insert(df[new], keys[new])
+
+    def _stage_keys(self, keys):
+        """把指纹写入临时表 staged_keys，用于与台账联表查询（不必读出整个台账）"""
+        self._conn.execute('CREATE TEMP TABLE IF NOT EXISTS staged_keys (key INTEGER PRIMARY KEY)')
+        self._conn.execute('DELETE FROM staged_keys')
+        self._conn.executemany('INSERT OR IGNORE INTO staged_keys VALUES (?)', ((int(key),) for key in keys))
+
+    def _insert(self, df, keys):
+        self._apply(df, 1)
+        skills = df['技能列表'].map(lambda items: json.dumps(items if isinstance(items, list) else [],
+                                                             ensure_ascii=False))
+        salary = pd.Series(np.asarray(df['平均薪资'], dtype=float))
+        self._conn.executemany('INSERT INTO ledger VALUES (?, ?, ?, ?)', zip(
+            keys.tolist(), np.asarray(df['岗位类别'], dtype=object).tolist(),
+            salary.astype(object).where(salary.notna(), None).tolist(), skills.tolist()))
+        return len(df)
+
+    def retract(self, keys):
+        """撤销岗位（按指纹），用台账中记录的值减去它们的贡献；返回实际撤销的岗位数"""
+        self._stage_keys(keys)
+        removed = pd.read_sql_query('SELECT ledger.* FROM ledger JOIN staged_keys USING (key)', self._conn)
+        removed = pd.DataFrame({
+            '岗位类别': removed['category'],
+            '平均薪资': removed['salary'].astype(float),
+            '技能列表': removed['skills'].map(json.loads)
+        })
+        self._apply(removed, -1)
+        self._conn.execute('DELETE FROM ledger WHERE key IN (SELECT key FROM staged_keys)')
+        return len(removed)
+
+    @profiled('aggregates.update')
+    def update(self, df=None, added=None, removed=None):
+        """与当前的全部数据 df 同步：计入新增的岗位、撤销已不存在的岗位，返回 (新增数, 删除数)
+        调用方已知变化时可不传 df，只传 added（新增的岗位）和 removed（已删除岗位的指纹），不再对全部数据计算指纹"""
+        if added is not None or removed is not None:
+            removed_count = self.retract(removed) if removed is not None and len(removed) else 0
+            added_count = self.add(added) if added is not None else 0
+        else:
+            keys = row_fingerprints(df)
+            known = self.keys()
+            new = ~np.isin(keys, known)
+            gone = known[~np.isin(known, keys)]
+            removed_count = self.retract(gone) if len(gone) else 0
+            added_count = self._insert(df[new], keys[new])
+        logging.info(f"聚合状态增量更新：新增 {added_count} 条，删除 {removed_count} 条，当前共 {len(self)} 条")
+        return added_count, removed_count
+
+    def merge(self, other):
+        """合并另一个聚合状态（两者的岗位不应重叠），台账一并合并"""
+        self.categories = _combine(self.categories, other.categories, 1, '岗位数')
+        self.by_category = _combine(self.by_category, other.by_category, 1, '岗位数')
+        self.skill_pairs = _combine(self.skill_pairs, other.skill_pairs, 1, None)
+        self._conn.executemany('INSERT OR IGNORE INTO ledger VALUES (?, ?, ?, ?)',
+                               other._conn.execute('SELECT * FROM ledger'))
+        return self
+
+    def save(self):
+        """把聚合表和台账的变化写入状态文件"""
+        for table, frame in [('categories', self.categories), ('category_skills', self.by_category),
+                             ('cooccurrence', self.skill_pairs.to_frame('共现岗位数'))]:
+            frame.reset_index().to_sql(table, self._conn, if_exists='replace', index=False)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 以下查询与 analyze_data 中从DataFrame计算的结果一致
+
+    def job_category_counts(self):
+        """各岗位类别的岗位数，按数量降序（数量相同时按类别名）"""
+        return sort_counts(self.categories['岗位数'].round().astype('int64').rename('count'))
+
+    def salary_by_category(self):
+        """各岗位类别的平均薪资，按薪资降序"""
+        mean = self.categories['薪资总和'] / self.categories['薪资岗位数'].replace(0, np.nan)
+        return mean.rename('平均薪资').sort_values(ascending=False)
+
+    def salary_stats_by_category(self):
+        """各岗位类别的 岗位数、平均薪资 和 薪资标准差（由平方和计算）"""
+        n = self.categories['薪资岗位数'].replace(0, np.nan)
+        mean = self.categories['薪资总和'] / n
+        variance = (self.categories['薪资平方和'] - n * mean ** 2) / (n - 1).replace(0, np.nan)
+        return pd.DataFrame({
+            '岗位数': self.categories['岗位数'].round().astype('int64'),
+            '平均薪资': mean,
+            '薪资标准差': np.sqrt(variance.clip(lower=0))
+        })
+
+    def skill_counts(self):
+        """全局技能出现频次（Counter）"""
+        return sorted_counter(self.by_skill['出现次数'].round().astype('int64'))
+
+    def category_skills(self):
+        """{岗位类别: 技能出现频次Counter}"""
+        counts = self.by_category['出现次数'].round().astype('int64')
+        return {category: sorted_counter(group.droplevel(0))
+                for category, group in counts.groupby(level='岗位类别', sort=False)}
+
+    def skill_salary(self):
+        """每个技能的 岗位数 和 平均薪资（忽略缺失薪资）"""
+        by_skill = self.by_skill
+        stats = pd.DataFrame({'岗位数': by_skill['岗位数'].round().astype('int64')})
+        stats['平均薪资'] = by_skill['薪资总和'] / by_skill['薪资岗位数'].replace(0, np.nan)
+        return stats
+
+    def posting_counts(self):
+        """每个技能出现在多少个岗位中，按数量降序（数量相同时按技能名）"""
+        return sort_counts(self.by_skill['岗位数'].round().astype('int64').rename('岗位数'))
+
+    def cooccurrence(self, min_count=1):
+        """技能两两共现的岗位数（技能A<技能B，按共现次数降序）"""
+        pairs = self.skill_pairs.round().astype('int64')
+        pairs = pairs[pairs >= min_count].rename('共现岗位数').reset_index()
+        return pairs.sort_values('共现岗位数', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,315 @@
+import pandas as pd
+import numpy as np
+import logging
+from collections import Counter
+
+from charts import bar_chart_spec, barplot_chart_spec, hist_chart_spec, line_chart_spec, render_charts
+from profiler import stage, profiled
+
+# 数据分析：技能倒排索引、技能聚合和各项统计分析
+
+
+# 计数排序：按数量降序，数量相同时按名称升序，使全量计算和增量聚合状态得到相同的顺序
+def sort_counts(counts):
+    names = np.asarray(counts.index.astype(str), dtype=str)
+    return counts.iloc[np.lexsort((names, -counts.to_numpy()))]
+
+
+# 按 sort_counts 的顺序构建Counter：most_common 在频次相同时保持插入顺序，即按名称升序
+def sorted_counter(counts):
+    return Counter(sort_counts(counts).to_dict())
+
+
+# 技能倒排索引：由 技能列表 一次性构建，按技能精确匹配（不会把"JavaScript"算作"Java"）
+# 以CSR形式存储：indptr[i]:indptr[i+1] 为第i个技能对应的岗位行号（按行号升序）
+class SkillIndex:
+    def __init__(self, skill_lists):
+        """skill_lists: 每个岗位的技能列表（不是列表的视为没有技能），岗位行号为其位置序号"""
+        skill_lists = pd.Series(list(skill_lists), dtype=object)
+        n_rows = len(skill_lists)
+        skill_lists = skill_lists[skill_lists.map(lambda skills: isinstance(skills, list))]
+        self._build(n_rows, skill_lists.explode().dropna())
+
+    @classmethod
+    def from_csr(cls, n_rows, indptr, codes, vocab):
+        """由按岗位排列的CSR技能数组构建（indptr[i]:indptr[i+1] 为第i个岗位的技能编码），不需要展开成技能列表"""
+        index = cls.__new__(cls)
+        rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+        index._build(n_rows, pd.Series(pd.Index(vocab).take(codes), index=rows, dtype=object))
+        return index
+
+    def _build(self, n_rows, exploded):
+        """exploded: 以岗位行号为索引、每个技能一行的Series"""
+        self.n_rows = n_rows
+        exploded = exploded.astype(str).str.strip()
+        exploded = exploded[exploded != '']
+
+        # 长表：每个 (岗位, 技能) 一行，count 为该技能在岗位中出现的次数
+        long = exploded.groupby([exploded.index, exploded.values], sort=False).size()
+        codes, vocab = pd.factorize(long.index.get_level_values(1))
+        self.vocab = pd.Index(vocab, name='技能')
+        self.long = pd.DataFrame({
+            'row': long.index.get_level_values(0).to_numpy(dtype=np.int64),
+            'code': codes,
+            'count': long.to_numpy()
+        })
+
+        order = np.lexsort((self.long['row'].to_numpy(), codes))
+        self.indices = self.long['row'].to_numpy()[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+
+    def postings(self, skill):
+        """包含该技能的岗位行号数组"""
+        if skill not in self.vocab:
+            return np.empty(0, dtype=np.int64)
+        code = self.vocab.get_loc(skill)
+        return self.indices[self.indptr[code]:self.indptr[code + 1]]
+
+    def posting_counts(self):
+        """每个技能出现在多少个岗位中，按数量降序"""
+        return sort_counts(pd.Series(np.diff(self.indptr), index=self.vocab, name='岗位数'))
+
+    def matrix(self):
+        """技能×岗位 的0/1稀疏矩阵"""
+        from scipy import sparse
+
+        return sparse.csr_matrix((np.ones(len(self.indices), dtype=np.int32), self.indices, self.indptr),
+                                 shape=(len(self.vocab), self.n_rows))
+
+    def salary_stats(self, salary):
+        """salary 为按岗位行号排列的薪资，返回每个技能的 岗位数 和 平均薪资（忽略缺失薪资）"""
+        values = np.asarray(salary, dtype=float)[self.long['row'].to_numpy()]
+        stats = pd.DataFrame({'code': self.long['code'], '薪资': values}).groupby('code')['薪资'].agg(['size', 'mean'])
+        stats.index = self.vocab[stats.index]
+        stats.columns = ['岗位数', '平均薪资']
+        return stats
+
+    def category_counts(self, categories):
+        """categories 为按岗位行号排列的类别，返回 类别×技能 的岗位数长表"""
+        category_values = np.asarray(categories, dtype=object)[self.long['row'].to_numpy()]
+        counts = pd.DataFrame({'岗位类别': category_values, '技能': self.vocab[self.long['code']]})
+        return counts.groupby(['岗位类别', '技能']).size().rename('岗位数').reset_index()
+
+    def cooccurrence(self, min_count=1):
+        """技能两两共现的岗位数（技能A<技能B，按共现次数降序）"""
+        matrix = self.matrix()
+        co = (matrix @ matrix.T).tocoo()
+        mask = (co.row < co.col) & (co.data >= min_count)
+        return pd.DataFrame({
+            '技能A': self.vocab[co.row[mask]],
+            '技能B': self.vocab[co.col[mask]],
+            '共现岗位数': co.data[mask]
+        }).sort_values('共现岗位数', ascending=False, kind='stable').reset_index(drop=True)
+
+
+# 技能聚合层：在技能倒排索引的长表上做一次 (岗位类别, 技能) groupby，
+# 由同一份结果汇总出全局技能频次、各类别技能频次和每个技能的薪资统计，供 analyze_data 和 generate_report 共用
+class SkillAggregates:
+    def __init__(self, df, skill_index=None):
+        self.skill_index = skill_index if skill_index is not None else SkillIndex(df['技能列表'])
+        long = self.skill_index.long
+        rows = long['row'].to_numpy()
+        frame = pd.DataFrame({
+            '岗位类别': np.asarray(df['岗位类别'], dtype=object)[rows],
+            '技能': self.skill_index.vocab[long['code']],
+            'count': long['count'].to_numpy(),
+            '薪资': np.asarray(df['平均薪资'], dtype=float)[rows]
+        })
+        frame['薪资平方'] = frame['薪资'] ** 2
+        # 类别×技能：出现次数、岗位数、薪资总和、有薪资的岗位数、薪资平方和（类别按首次出现的顺序排列）
+        self.by_category = frame.groupby(['岗位类别', '技能'], sort=False).agg(
+            出现次数=('count', 'sum'),
+            岗位数=('count', 'size'),
+            薪资总和=('薪资', 'sum'),
+            薪资岗位数=('薪资', 'count'),
+            薪资平方和=('薪资平方', 'sum')
+        )
+        self.by_skill = self.by_category.groupby(level='技能', sort=False).sum()
+
+    def skill_counts(self):
+        """全局技能出现频次（Counter）"""
+        return sorted_counter(self.by_skill['出现次数'])
+
+    def category_skills(self):
+        """{岗位类别: 技能出现频次Counter}"""
+        counts = self.by_category['出现次数']
+        return {category: sorted_counter(group.droplevel(0))
+                for category, group in counts.groupby(level='岗位类别', sort=False)}
+
+    def skill_salary(self):
+        """每个技能的 岗位数 和 平均薪资（忽略缺失薪资）"""
+        stats = pd.DataFrame({'岗位数': self.by_skill['岗位数']})
+        stats['平均薪资'] = self.by_skill['薪资总和'] / self.by_skill['薪资岗位数'].replace(0, np.nan)
+        return stats
+
+    def posting_counts(self):
+        """每个技能出现在多少个岗位中，按数量降序"""
+        return self.skill_index.posting_counts()
+
+    def cooccurrence(self):
+        """技能两两共现的岗位数"""
+        return self.skill_index.cooccurrence()
+
+# 数据分析
+# draw_charts=False 时只计算统计结果不绘图（只生成报告时使用）
+# chart_workers: 绘图进程数（None为CPU核数，1为串行）；skip_unchanged_charts: 跳过数据未变化的图表
+# aggregates: 可选的增量维护的聚合状态（aggregates.AggregateState，已与df同步），
+# 提供时岗位分布、类别薪资和技能统计直接取自聚合状态，不再从df重新计算
+# trends: 可选的快照库趋势数据（snapshots.SnapshotStore.trends()），有两个以上周期时绘制趋势图
+@profiled()
+def analyze_data(df, draw_charts=True, chart_workers=None, skip_unchanged_charts=True, aggregates=None,
+                 trends=None):
+    chart_specs = []
+
+    # 1. 岗位分布分析
+    with stage('analyze_data.岗位分布'):
+        if aggregates is not None:
+            job_category_counts = aggregates.job_category_counts()
+        else:
+            job_category_counts = sort_counts(df['岗位类别'].value_counts())
+        chart_specs.append(bar_chart_spec(job_category_counts, '岗位类别分布.png',
+                                          '实习岗位类别分布', '岗位类别', '岗位数量', 'skyblue'))
+
+    # 2. 公司类型分布
+    with stage('analyze_data.公司类型分布'):
+        company_type_counts = job_category_counts.head(10)
+        chart_specs.append(bar_chart_spec(company_type_counts, '企业类型分布.png',
+                                          '企业类型分布（Top 10）', '企业类型', '数量', 'lightgreen'))
+
+    # 3. 薪资分析
+    with stage('analyze_data.薪资分析'):
+        # 按岗位类别的平均薪资
+        if aggregates is not None:
+            salary_by_category = aggregates.salary_by_category()
+        else:
+            salary_by_category = df.groupby('岗位类别')['平均薪资'].mean().sort_values(ascending=False)
+        chart_specs.append(bar_chart_spec(salary_by_category, '各岗位类别平均薪资.png',
+                                          '各岗位类别平均薪资', '岗位类别', '平均薪资（元/天）', 'salmon'))
+
+    # 4. 技能要求分析
+    with stage('analyze_data.技能要求'):
+        # 技能只拆分一次：全局频次、各类别频次和技能薪资都来自同一次聚合
+        skill_aggregates = aggregates if aggregates is not None else SkillAggregates(df)
+
+        # 计算各技能出现频次
+        skill_counts = skill_aggregates.skill_counts()
+
+        # 创建技能频率表并保存（代替wordcloud，避免NumPy 2.0兼容性问题）
+        top_skills_df = pd.DataFrame(skill_counts.most_common(50), columns=['技能', '频次'])
+        top_skills_df.to_csv('技能频率表.csv', index=False, encoding='utf-8-sig')
+
+        # 绘制技能频率条形图
+        chart_specs.append(barplot_chart_spec(top_skills_df.head(20), '频次', '技能', '热门技能TOP20.png',
+                                              '热门技能TOP20', '出现频次', '技能', 'viridis', (14, 10)))
+
+    # 5. 各岗位类别对应的主要技能要求
+    with stage('analyze_data.各类别技能'):
+        category_skills = skill_aggregates.category_skills()
+
+        # 为每个岗位类别绘制Top10技能
+        for category, skills_counter in category_skills.items():
+            if len(skills_counter) > 0:
+                top_skills = pd.DataFrame(skills_counter.most_common(10), columns=['技能', '频次'])
+                safe_category = category.replace("/", "_")
+                chart_specs.append(barplot_chart_spec(top_skills, '频次', '技能', f'{safe_category}岗位技能需求.png',
+                                                      f'{category}岗位Top10技能需求', '出现频次', '技能',
+                                                      'viridis', (12, 6)))
+
+    # 6. 技能与薪资关系分析
+    with stage('analyze_data.技能薪资'):
+        # 基于技能倒排索引一次性计算所有技能对应岗位的平均薪资（使用聚合状态时没有倒排索引，skill_index 为None）
+        skill_index = skill_aggregates.skill_index
+        skill_salary_all = skill_aggregates.skill_salary()
+
+        # 图表中展示出现岗位数前20的技能
+        top_skills = skill_aggregates.posting_counts().head(20).index
+        skill_salary_df = (skill_salary_all.loc[top_skills, ['平均薪资']]
+                           .rename_axis('技能').reset_index()
+                           .sort_values('平均薪资', ascending=False))
+
+        # 技能共现关系
+        skill_cooccurrence = skill_aggregates.cooccurrence()
+
+        chart_specs.append(barplot_chart_spec(skill_salary_df, '平均薪资', '技能', '技能薪资关系.png',
+                                              '各技能对应的平均薪资', '平均薪资（元/天）', '技能', 'coolwarm', (14, 8)))
+
+    # 7. 薪资分布直方图
+    with stage('analyze_data.薪资分布'):
+        # 确保数据为NumPy数组并去除缺失值
+        salary_data = np.array(df['平均薪资'].dropna().values)
+
+        # 过滤掉异常值（如负值或极大值）
+        salary_data = salary_data[(salary_data > 0) & (salary_data < 100000)]  # 假设薪资上限为100000元/月
+
+        # 检查数据是否为空
+        if len(salary_data) == 0:
+            logging.warning("薪资数据为空，无法绘制直方图")
+        else:
+            logging.info(f"薪资数据形状: {salary_data.shape}, 数据类型: {salary_data.dtype}")
+            chart_specs.append(hist_chart_spec(salary_data, '薪资分布直方图.png',
+                                               '实习岗位薪资分布', '平均薪资（元/月）', '岗位数量'))  # 修改单位说明
+
+    # 8. 薪资和技能需求趋势
+    if trends is not None and len(trends['category_salary']) >= 2:
+        with stage('analyze_data.趋势'):
+            period_name = '周' if trends['period'] == 'week' else '日'
+            chart_specs.append(line_chart_spec(trends['category_salary'], '各岗位类别薪资趋势.png',
+                                               f'各岗位类别平均薪资趋势（按{period_name}）', '周期起始日期',
+                                               '平均薪资（元/月）'))
+            chart_specs.append(line_chart_spec(trends['skill_demand'], '热门技能需求趋势.png',
+                                               f'热门技能需求趋势（按{period_name}）', '周期起始日期',
+                                               '平均每次爬取的岗位数'))
+
+    # 所有图表统一并行渲染
+    if draw_charts:
+        render_charts(chart_specs, max_workers=chart_workers, skip_unchanged=skip_unchanged_charts)
+
+    return {
+        'job_category_counts': job_category_counts,
+        'company_type_counts': company_type_counts,
+        'salary_by_category': salary_by_category,
+        'skill_counts': skill_counts,
+        'category_skills': category_skills,
+        'skill_salary': skill_salary_df,
+        'skill_salary_all': skill_salary_all,
+        'skill_cooccurrence': skill_cooccurrence,
+        'skill_index': skill_index,
+        'skill_aggregates': skill_aggregates,
+        'trends': trends
+    }
+
+
+# 流式近似分析：stats 为 sketches.StreamingStats（已单遍计入全部数据），内存占用与数据量无关
+# 薪资分布直方图用1001个等间隔分位数近似
+@profiled()
+def analyze_stream(stats, draw_charts=True, chart_workers=None, skip_unchanged_charts=True):
+    job_category_counts = stats.job_category_counts()
+    salary_quantiles = stats.salary_quantiles()
+    top_skills = stats.top_skills(20)
+
+    chart_specs = [
+        bar_chart_spec(job_category_counts, '岗位类别分布.png', '实习岗位类别分布', '岗位类别', '岗位数量', 'skyblue'),
+        bar_chart_spec(salary_quantiles['P50'] if not salary_quantiles.empty else pd.Series(dtype=float),
+                       '各岗位类别薪资中位数.png', '各岗位类别薪资中位数（近似）', '岗位类别', '薪资中位数（元/月）', 'salmon'),
+        barplot_chart_spec(top_skills, '估计频次', '技能', '热门技能TOP20.png',
+                           '热门技能TOP20（近似）', '估计出现频次', '技能', 'viridis', (14, 10))
+    ]
+    salary_points = stats.salary.quantiles(np.linspace(0, 1, 1001))
+    salary_points = salary_points[(salary_points > 0) & (salary_points < 100000)]
+    if len(salary_points):
+        chart_specs.append(hist_chart_spec(salary_points, '薪资分布直方图.png',
+                                           '实习岗位薪资分布（近似）', '平均薪资（元/月）', '分位点数量'))
+
+    if draw_charts:
+        render_charts(chart_specs, max_workers=chart_workers, skip_unchanged=skip_unchanged_charts)
+
+    return {
+        'job_category_counts': job_category_counts,
+        'salary_quantiles': salary_quantiles,
+        'top_skills': top_skills,
+        'salary_median': stats.salary.quantile(0.5),
+        'salary_rank_error': stats.salary.rank_error(),
+        'skill_error_bound': stats.skills.sketch.error_bound(),
+        'skill_error_probability': stats.skills.sketch.delta,
+        'job_count': stats.n
+    }
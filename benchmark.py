@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+
+from profiler import PROFILER, enable_profiling, stage
+
+# 流水线基准测试：
+# 1. 爬取：本地HTTP服务器提供 benchmark_fixtures/ 中录制的实习僧列表页和详情页，
+#    用 iter_shixiseng_pages 完整走一遍 请求 -> 解析 的流程（不访问真实网站，结果可重复）
+# 2. 处理：生成指定规模（如 1万/10万/100万 行）的合成原始数据，依次执行 去重 -> 预处理 -> 分析 -> 报告
+# 各阶段的耗时（和可选的内存）由 profiler 记录，结果写入JSON文件并打印汇总表，便于在改动前后对比
+# 用法：python benchmark.py --sizes 10000 100000 1000000 --output 基准测试结果.json
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_fixtures')
+LIST_FIXTURE = 'shixiseng_list.html'
+DETAIL_FIXTURES = ['shixiseng_detail_1.html', 'shixiseng_detail_2.html', 'shixiseng_detail_3.html']
+
+# 合成数据的取值范围，与实际爬取的数据分布相近
+SYNTHETIC_TITLES = ['Java开发实习生', 'Python开发实习', '前端开发实习生', '数据分析实习生', '算法工程师实习', '产品经理实习',
+                    '产品运营实习', 'UI设计实习生', '新媒体运营实习', '财务实习生', '投资实习岗', '人力资源实习生',
+                    '行政实习生', '市场营销实习', '测试开发实习', '实习讲师']
+SYNTHETIC_COMPANY_PARTS = ['清云', '睿民', '字节', '网易', '米哈游', '腾讯', '美团', '方广', '德勤', '新祥旭', '智飞', '星辰',
+                           '蓝海', '云图', '极客', '远景']
+SYNTHETIC_COMPANY_SUFFIXES = ['科技', '科技有限公司', '资本', '网络', '教育', '']
+SYNTHETIC_SALARIES = ['100-150/天', '150-200/天', '100-200/天', '200-400/天', '100-120/天', '50-80/天', '80-150/天',
+                      '4000-6000/月', '薪资面议']
+SYNTHETIC_SKILLS = ['Python', 'Java', 'SQL', 'Excel', 'Linux', 'JavaScript', 'React', 'Vue', '机器学习', '数据分析',
+                    'Photoshop', 'Figma', '沟通能力', '团队合作', '英语', 'Office', '可转正实习', '远程实习', '暑期实习']
+
+
+# 录制页面服务器：/interns 返回列表页，/intern/<岗位ID> 按岗位ID固定返回其中一个详情页
+# latency: 每个请求的模拟网络延迟（秒）
+def make_fixture_handler(latency=0.0):
+    pages = {}
+    for name in [LIST_FIXTURE] + DETAIL_FIXTURES:
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            pages[name] = f.read()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/interns':
+                body = pages[LIST_FIXTURE]
+            elif path.startswith('/intern/'):
+                body = pages[DETAIL_FIXTURES[zlib.crc32(path.encode('utf-8')) % len(DETAIL_FIXTURES)]]
+            else:
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+@contextmanager
+def serve_fixtures(latency=0.0):
+    """在本地随机端口启动录制页面服务器，产出其地址"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_fixture_handler(latency))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# 爬取基准：对录制页面执行 pages 页的实习僧爬取，返回爬到的岗位数
+def benchmark_scrape(pages=5, workers=8, parser=None, latency=0.0):
+    from scraper import configure_http, iter_shixiseng_pages
+
+    configure_http(pool_size=max(workers, 1))
+    with serve_fixtures(latency) as base_url:
+        with stage('爬取'):
+            page_iter = iter_shixiseng_pages('实习', max_page=pages, max_workers=workers, rate_limit=1000,
+                                             parser=parser, base_url=base_url)
+            return sum(len(page_jobs) for _, page_jobs in page_iter)
+
+
+# 生成 n_rows 行与原始数据格式相同的合成数据，duplicate_rate 比例的行是其他行的重复（岗位ID相同或名称略有不同）
+def synthetic_raw_data(n_rows, duplicate_rate=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    n_unique = max(1, int(n_rows * (1 - duplicate_rate)))
+
+    def pick(values, size):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+    companies = (pd.Series(pick(SYNTHETIC_COMPANY_PARTS, n_unique)) + pd.Series(pick(SYNTHETIC_COMPANY_PARTS, n_unique))
+                 + pd.Series(rng.integers(0, max(1, n_unique // 20), n_unique)).astype(str)
+                 + pd.Series(pick(SYNTHETIC_COMPANY_SUFFIXES, n_unique)))
+    skill_counts = rng.integers(0, 6, n_unique)
+    skill_codes = rng.integers(0, len(SYNTHETIC_SKILLS), skill_counts.sum())
+    skill_text = pd.Series(np.asarray(SYNTHETIC_SKILLS, dtype=object)[skill_codes],
+                           index=np.repeat(np.arange(n_unique), skill_counts))
+    skills = skill_text.groupby(level=0).agg(', '.join).reindex(np.arange(n_unique), fill_value='')
+    # 岗位描述中另外提到的技能
+    mention_counts = rng.integers(1, 5, n_unique)
+    mention_codes = rng.integers(0, len(SYNTHETIC_SKILLS), mention_counts.sum())
+    mentions = pd.Series(np.asarray(SYNTHETIC_SKILLS, dtype=object)[mention_codes],
+                         index=np.repeat(np.arange(n_unique), mention_counts)).groupby(level=0).agg('、'.join)
+    descriptions = ('岗位职责：\n1. 参与日常业务支持工作；\n2. 完成导师安排的任务。\n任职要求：\n1. 本科及以上在读，每周至少实习4天；\n'
+                    '2. 熟练使用' + mentions + '，具备良好的学习能力。')
+    posting_ids = pd.Series(np.arange(n_unique)).map(lambda i: f'inn_{i:012d}')
+
+    unique = pd.DataFrame({
+        '岗位名称': pick(SYNTHETIC_TITLES, n_unique),
+        '公司名称': companies.to_numpy(dtype=object),
+        '公司类型': pick(['未知', '互联网/IT', '金融', '教育'], n_unique),
+        '薪资范围': pick(SYNTHETIC_SALARIES, n_unique),
+        '技能要求': skills.to_numpy(dtype=object),
+        '数据来源': pick(['实习僧', '拉勾网'], n_unique),
+        '详情页URL': ('https://www.shixiseng.com/intern/' + posting_ids + '?pcm=pc_SearchList').to_numpy(dtype=object),
+        '岗位描述': descriptions.to_numpy(dtype=object)
+    })
+
+    # 重复行：一半是同一岗位的再次爬取，一半是其他数据源上名称写法略有不同的同一岗位
+    duplicates = unique.iloc[rng.integers(0, n_unique, n_rows - n_unique)].reset_index(drop=True)
+    reworded = rng.random(len(duplicates)) < 0.5
+    duplicates.loc[reworded, '岗位名称'] = duplicates.loc[reworded, '岗位名称'] + '（北京）'
+    duplicates.loc[reworded, '公司名称'] = duplicates.loc[reworded, '公司名称'] + '有限公司'
+    duplicates.loc[reworded, '详情页URL'] = ''
+    duplicates.loc[reworded, '数据来源'] = '拉勾网'
+    return pd.concat([unique, duplicates], ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+# 处理基准：在临时目录中对 n_rows 行合成数据执行 去重 -> 预处理 -> 分析（不绘图） -> 报告
+def benchmark_pipeline(n_rows, seed=0):
+    from Main import run_preprocess, run_analyze
+
+    raw_df = synthetic_raw_data(n_rows, seed=seed)
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        for name in ('岗位类别规则.json', '技能词典.txt'):
+            if os.path.exists(os.path.join(repo_dir, name)):
+                shutil.copy(os.path.join(repo_dir, name), work_dir)
+        os.chdir(work_dir)
+        with stage('run_preprocess'):
+            processed_df = run_preprocess(raw_df)
+        with stage('run_analyze'):
+            run_analyze(processed_df, draw_charts=False)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return len(processed_df)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="爬取与数据处理流水线的基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help="合成数据的行数（可以多个）")
+    parser.add_argument('--pages', type=int, default=5, help="爬取录制页面的列表页数（0为跳过爬取基准）")
+    parser.add_argument('--workers', type=int, default=8, help="并发抓取详情页的线程数")
+    parser.add_argument('--parser', choices=['selectolax', 'lxml', 'html.parser'], default=None, help="HTML解析后端")
+    parser.add_argument('--latency', type=float, default=0.0, help="录制页面服务器的模拟网络延迟（秒）")
+    parser.add_argument('--memory', action='store_true', help="同时用tracemalloc统计各阶段的内存（较慢）")
+    parser.add_argument('--output', default='基准测试结果.json', help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    results = {'python': sys.version.split()[0], 'pandas': pd.__version__, 'numpy': np.__version__, 'runs': []}
+
+    if args.pages > 0:
+        profiler = enable_profiling(track_memory=args.memory)
+        jobs = benchmark_scrape(args.pages, workers=args.workers, parser=args.parser, latency=args.latency)
+        print(f"\n爬取录制页面 {args.pages} 页，共 {jobs} 条岗位")
+        print(profiler.summary())
+        results['runs'].append({'基准': '爬取', '页数': args.pages, '岗位数': jobs, 'stages': profiler.results()})
+
+    for n_rows in args.sizes:
+        profiler = enable_profiling(track_memory=args.memory)
+        kept = benchmark_pipeline(n_rows)
+        print(f"\n处理 {n_rows} 行合成数据（去重后 {kept} 行）")
+        print(profiler.summary())
+        results['runs'].append({'基准': '处理', '行数': n_rows, '去重后行数': kept, 'stages': profiler.results()})
+    PROFILER.disable()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from profiler import profiled
+
+# 图表描述与渲染；matplotlib/seaborn 只在真正需要绘图时（通常是绘图子进程中）才导入
+
+
+# 设置绘图字体；主进程和每个绘图子进程都需要调用
+def configure_chart_fonts():
+    import matplotlib
+    import seaborn as sns
+
+    # 图表只输出到文件，使用非交互式的Agg后端
+    matplotlib.use('Agg')
+
+    # 设置matplotlib中文字体（修改为更通用的字体名称）
+    matplotlib.rcParams['font.sans-serif'] = ['Songti SC', 'SimHei', 'Arial Unicode MS']  # 增加多个备选字体
+    matplotlib.rcParams['font.family'] = 'sans-serif'  # 新增：指定字体家族为无衬线
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决保存图像时负号'-'显示为方块的问题
+
+    # 添加对seaborn的字体设置（显式指定支持中文字体）
+    sns.set(font='Songti SC')  # 修改为与matplotlib一致的主字体
+
+
+# 图表描述：每个图表是一个只包含基本类型的字典（可序列化、可哈希），由 render_chart 独立渲染
+# kind: 'bar'（类别柱状图）、'barplot'（seaborn横向条形图）、'hist'（直方图）、'line'（多条折线的趋势图）
+def bar_chart_spec(series, filename, title, xlabel, ylabel, color):
+    return {
+        'kind': 'bar', 'filename': filename, 'figsize': [12, 6],
+        'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'color': color,
+        'labels': [str(label) for label in series.index], 'values': series.tolist()
+    }
+
+
+def barplot_chart_spec(frame, x, y, filename, title, xlabel, ylabel, palette, figsize):
+    return {
+        'kind': 'barplot', 'filename': filename, 'figsize': list(figsize),
+        'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'palette': palette,
+        'x': x, 'y': y, 'data': {x: frame[x].tolist(), y: frame[y].tolist()}
+    }
+
+
+def hist_chart_spec(values, filename, title, xlabel, ylabel, bins=30):
+    return {
+        'kind': 'hist', 'filename': filename, 'figsize': [12, 6],
+        'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'bins': bins,
+        'values': np.asarray(values, dtype=float).tolist()
+    }
+
+
+def line_chart_spec(frame, filename, title, xlabel, ylabel, figsize=(14, 7)):
+    """frame 的索引为横轴（如周期），每一列画一条折线，缺失值处断开"""
+    return {
+        'kind': 'line', 'filename': filename, 'figsize': list(figsize),
+        'title': title, 'xlabel': xlabel, 'ylabel': ylabel,
+        'labels': [str(label) for label in frame.index],
+        'series': {str(column): [None if pd.isna(value) else float(value) for value in frame[column]]
+                   for column in frame.columns}
+    }
+
+
+def chart_spec_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+# 渲染单个图表：使用面向对象的Figure接口，不依赖pyplot的全局状态，可以在子进程中并行执行
+def render_chart(spec):
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    fig = Figure(figsize=spec['figsize'])
+    ax = fig.subplots()
+    if spec['kind'] == 'bar':
+        positions = range(len(spec['labels']))
+        ax.bar(positions, spec['values'], color=spec['color'])
+        ax.set_xticks(list(positions))
+        ax.set_xticklabels(spec['labels'], rotation=45)
+    elif spec['kind'] == 'barplot':
+        data = pd.DataFrame(spec['data'])
+        sns.barplot(x=spec['x'], y=spec['y'], data=data, hue=spec['y'], palette=spec['palette'], legend=False, ax=ax)
+    elif spec['kind'] == 'hist':
+        sns.histplot(np.asarray(spec['values']), bins=spec['bins'], kde=True, ax=ax)
+    elif spec['kind'] == 'line':
+        positions = range(len(spec['labels']))
+        for name, values in spec['series'].items():
+            ax.plot(list(positions), np.asarray(values, dtype=float), marker='o', label=name)
+        ax.set_xticks(list(positions))
+        ax.set_xticklabels(spec['labels'], rotation=45)
+        ax.legend(loc='best', fontsize='small')
+    else:
+        raise ValueError(f"未知的图表类型: {spec['kind']}")
+    ax.set_title(spec['title'])
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+    fig.tight_layout()
+    fig.savefig(spec['filename'])
+    return spec['filename']
+
+
+def _render_chart_safe(spec):
+    try:
+        return render_chart(spec)
+    except Exception as e:
+        logging.error(f"绘制图表失败: {spec['filename']}, 错误: {e}")
+        return None
+
+
+# 批量渲染图表：多进程并行渲染；skip_unchanged=True 时跳过输入数据与上次相同且文件仍存在的图表
+# 每个图表的哈希记录在 manifest_path 中；max_workers=1 时在当前进程串行渲染
+@profiled()
+def render_charts(specs, max_workers=None, skip_unchanged=True, manifest_path="图表缓存.json"):
+    # 即使不跳过未变化的图表也要读取已有记录：本次只更新重新绘制的图表，其他图表的记录保留
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    hashes = {spec['filename']: chart_spec_hash(spec) for spec in specs}
+    pending = [spec for spec in specs
+               if not (skip_unchanged and manifest.get(spec['filename']) == hashes[spec['filename']]
+                       and os.path.exists(spec['filename']))]
+    logging.info(f"共 {len(specs)} 个图表，需要重新绘制 {len(pending)} 个")
+
+    if max_workers == 1 or len(pending) <= 1:
+        configure_chart_fonts()
+        rendered = [_render_chart_safe(spec) for spec in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=configure_chart_fonts) as executor:
+            rendered = list(executor.map(_render_chart_safe, pending))
+
+    for filename in rendered:
+        if filename:
+            manifest[filename] = hashes[filename]
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return [filename for filename in rendered if filename]
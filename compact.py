@@ -0,0 +1,109 @@
+import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
+
+# 紧凑的岗位数据内存表示：文本列为category类型（字符串只保存一份），最低/最高薪资为Int32，
+# 技能列表拆成 技能词表 + CSR偏移/编码数组，不再为每个岗位保存一个Python列表，
+# 用于把多次爬取的历史数据放在内存中做聚合分析
+
+# 转换为category类型的文本列（重复值多，多次爬取之间大量重复）
+CATEGORY_COLUMNS = ['岗位名称', '公司名称', '公司类型', '薪资范围', '岗位类别', '类别关键词', '薪资单位', '数据来源']
+
+# 以Int32保存的薪资列（缺失值为<NA>）
+INT_SALARY_COLUMNS = ['最低薪资', '最高薪资']
+
+
+class CompactJobs:
+    def __init__(self, frame, skill_vocab, skill_indptr, skill_codes, skill_missing):
+        """frame: 不含 技能列表 的岗位数据；skill_indptr[i]:skill_indptr[i+1] 为第i个岗位在 skill_codes 中的技能编码；
+        skill_missing: 技能列表 为空值（而不是空列表）的岗位"""
+        self.frame = frame
+        self.skill_vocab = skill_vocab
+        self.skill_indptr = skill_indptr
+        self.skill_codes = skill_codes
+        self.skill_missing = skill_missing
+
+    def __len__(self):
+        return len(self.frame)
+
+    @classmethod
+    def from_frame(cls, df):
+        """由 preprocess_data 的输出（或 load_processed_data 读取的数据）构建"""
+        frame = df.drop(columns=['技能列表'], errors='ignore').reset_index(drop=True)
+        for column in CATEGORY_COLUMNS:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('category')
+        for column in INT_SALARY_COLUMNS:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('Int32')
+        if '平均薪资' in frame.columns:
+            frame['平均薪资'] = frame['平均薪资'].astype('float32')
+
+        skill_lists = df['技能列表'] if '技能列表' in df.columns else pd.Series([None] * len(df), dtype=object)
+        skill_lists = pd.Series(skill_lists.to_numpy(dtype=object), dtype=object)
+        is_list = skill_lists.map(lambda skills: isinstance(skills, list)).to_numpy(dtype=bool)
+        lengths = np.zeros(len(skill_lists), dtype=np.int64)
+        lengths[is_list] = skill_lists[is_list].map(len).to_numpy()
+
+        # 技能按出现顺序逐个编码（保留列表中的顺序和重复项，转换回列表时与原数据一致）
+        flat = skill_lists[is_list & (lengths > 0)].explode()
+        codes, vocab = pd.factorize(flat.to_numpy(dtype=object), use_na_sentinel=False)
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        return cls(frame, pd.Index(vocab, dtype=object, name='技能'), indptr, codes.astype(np.int32), ~is_list)
+
+    def to_frame(self):
+        """还原为 preprocess_data 输出的格式（object文本列、技能列表为Python列表）"""
+        df = self.frame.copy()
+        for column in CATEGORY_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype(object).where(df[column].notna(), None)
+        for column in INT_SALARY_COLUMNS:
+            if column in df.columns:
+                # 与 preprocess_data 一致：没有缺失值时为整数列，否则为浮点列
+                df[column] = df[column].astype('int64' if df[column].notna().all() else 'float64')
+        if '平均薪资' in df.columns:
+            df['平均薪资'] = df['平均薪资'].astype('float64')
+
+        skills = self.skill_vocab.to_numpy(dtype=object)[self.skill_codes]
+        skill_lists = [chunk.tolist() for chunk in np.split(skills, self.skill_indptr[1:-1])]
+        df['技能列表'] = [None if missing else skills for skills, missing in zip(skill_lists, self.skill_missing)]
+        return df
+
+    def skills(self, row):
+        """第row个岗位的技能列表"""
+        if self.skill_missing[row]:
+            return None
+        return self.skill_vocab[self.skill_codes[self.skill_indptr[row]:self.skill_indptr[row + 1]]].tolist()
+
+    def skill_index(self):
+        """直接由CSR数组构建技能倒排索引，可传给 SkillAggregates(compact.frame, skill_index=...)"""
+        from analysis import SkillIndex
+
+        return SkillIndex.from_csr(len(self), self.skill_indptr, self.skill_codes, self.skill_vocab)
+
+    def memory_usage(self):
+        """占用的内存字节数"""
+        return int(self.frame.memory_usage(index=True, deep=True).sum()
+                   + self.skill_vocab.memory_usage(deep=True)
+                   + self.skill_indptr.nbytes + self.skill_codes.nbytes + self.skill_missing.nbytes)
+
+    @classmethod
+    def concat(cls, parts):
+        """合并多次爬取的紧凑数据：category列合并类别，技能编码映射到合并后的词表"""
+        parts = list(parts)
+        frames = [part.frame for part in parts]
+        frame = pd.concat(frames, ignore_index=True)
+        for column in CATEGORY_COLUMNS:
+            if column in frame.columns and all(column in f.columns for f in frames):
+                frame[column] = union_categoricals([f[column] for f in frames], ignore_order=True)
+
+        vocab = pd.Index([], dtype=object, name='技能')
+        codes, indptrs, offset = [], [np.zeros(1, dtype=np.int64)], 0
+        for part in parts:
+            vocab = vocab.append(part.skill_vocab.difference(vocab, sort=False))
+            codes.append(vocab.get_indexer(part.skill_vocab)[part.skill_codes].astype(np.int32))
+            indptrs.append(part.skill_indptr[1:] + offset)
+            offset += part.skill_indptr[-1]
+        return cls(frame, pd.Index(vocab, name='技能'), np.concatenate(indptrs),
+                   np.concatenate(codes) if codes else np.empty(0, dtype=np.int32),
+                   np.concatenate([part.skill_missing for part in parts]) if parts else np.empty(0, dtype=bool))
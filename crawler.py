@@ -0,0 +1,189 @@
+import logging
+import queue
+import threading
+from collections import namedtuple
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import (AdaptiveRateLimiter, WebDriverPool, prepare_lagou_driver,
+                     iter_shixiseng_pages, iter_lagou_pages, iter_via_api_pages)
+from storage import RAW_COLUMNS
+
+# 多数据源爬取调度：所有 数据源×关键词 任务在同一个线程池中并发执行（总并发数受全局预算限制），
+# 同一域名的任务数受域名并发上限限制、请求共享按域名限速的限速器；
+# 数据源失败（出错或没有爬到岗位）时自动改用其备用数据源（如拉勾网Selenium -> 拉勾网API），
+# 所有任务的结果合并成一个按页产出的数据流，总耗时取决于最慢的数据源而不是各数据源之和
+
+# 数据源：
+# iter_pages(keyword, pages, start_page, limiter, **options) 为按页产出 (页码, 岗位列表) 的生成器
+# domain: 所属域名（用于域名并发上限）；concurrency: 该域名默认同时运行的任务数
+# fallback: 备用数据源名称；resources: 可选，resources(concurrency) 返回一个上下文管理器，
+# 产出该数据源所有任务共享的额外参数（如浏览器池），只在该数据源有任务时创建
+CrawlSource = namedtuple('CrawlSource', ['name', 'iter_pages', 'domain', 'concurrency', 'fallback', 'resources'])
+
+CRAWL_SOURCES = {}
+
+
+def register_source(name, iter_pages, domain, concurrency=1, fallback=None, resources=None):
+    CRAWL_SOURCES[name] = CrawlSource(name, iter_pages, domain, concurrency, fallback, resources)
+
+
+@contextmanager
+def _lagou_resources(concurrency):
+    # 拉勾网的所有关键词任务共享一个浏览器池，浏览器在第一次使用时才启动
+    with WebDriverPool(size=concurrency, prepare=prepare_lagou_driver) as pool:
+        yield {'pool': pool}
+
+
+register_source(
+    '实习僧',
+    lambda keyword, pages, start_page, limiter, **options: iter_shixiseng_pages(
+        keyword, max_page=pages, start_page=start_page, limiter=limiter, **options),
+    domain='www.shixiseng.com', concurrency=2
+)
+register_source(
+    '拉勾网',
+    lambda keyword, pages, start_page, limiter, **options: iter_lagou_pages(
+        keyword, pages=pages, start_page=start_page, limiter=limiter, **options),
+    domain='www.lagou.com', concurrency=2, fallback='拉勾网API', resources=_lagou_resources
+)
+register_source(
+    '拉勾网API',
+    lambda keyword, pages, start_page, limiter, **options: iter_via_api_pages(
+        keyword, pages=pages, start_page=start_page, limiter=limiter, **options),
+    domain='www.lagou.com', concurrency=2
+)
+
+
+# 统一岗位字段：补齐原始数据的所有列，缺少数据来源时使用数据源名称
+def normalize_job(job, source_name):
+    normalized = {column: job.get(column, '') for column in RAW_COLUMNS}
+    normalized['数据来源'] = job.get('数据来源') or source_name
+    return normalized
+
+
+# 检查点键：与单数据源爬取时使用的 "数据源|关键词" 一致
+def crawl_key(source_name, keyword):
+    return f"{source_name}|{keyword}"
+
+
+# 参与爬取的数据源，包括各数据源的备用数据源链（按首次出现的顺序）
+def involved_sources(sources):
+    involved = []
+    for name in sources:
+        while name and name not in involved:
+            involved.append(name)
+            name = CRAWL_SOURCES[name].fallback
+    return involved
+
+
+# 本次爬取可能写入检查点的所有键
+def crawl_keys(sources, keywords):
+    return [crawl_key(name, keyword) for name in involved_sources(sources) for keyword in keywords]
+
+
+# 并发爬取多个数据源和关键词，合并产出 (检查点键, 页码, 岗位列表)，可直接交给 storage.stream_to_storage
+# max_workers: 全局并发预算（同时运行的任务数）；domain_concurrency: {域名: 同时运行的任务数}，覆盖数据源默认值
+# rate_limit: 每个域名的初始请求速率（次/秒，所有任务共享，按服务端反馈自适应调整）；source_options: {数据源: 传给该数据源的额外参数}
+# start_pages: {检查点键: 已完成的页码}，用于断点续爬
+def iter_crawl(sources, keywords, pages=5, max_workers=4, domain_concurrency=None, rate_limit=None,
+               source_options=None, start_pages=None):
+    sources = list(sources)
+    keywords = list(keywords)
+    for name in sources:
+        if name not in CRAWL_SOURCES:
+            raise ValueError(f"未注册的数据源: {name}")
+    source_options = source_options or {}
+    start_pages = start_pages or {}
+    limiter = AdaptiveRateLimiter(rate_limit)
+
+    involved = involved_sources(sources)
+
+    def domain_limit(source):
+        return (domain_concurrency or {}).get(source.domain, source.concurrency)
+
+    domain_semaphores = {}
+    for name in involved:
+        source = CRAWL_SOURCES[name]
+        domain_semaphores.setdefault(source.domain, threading.Semaphore(domain_limit(source)))
+
+    # 有界队列：写入跟不上时爬虫线程等待，避免结果堆积在内存中
+    results = queue.Queue(maxsize=max(2, max_workers * 2))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run_task(source_name, keyword, shared):
+        visited = set()
+        name = source_name
+        while name and name not in visited and not stop.is_set():
+            visited.add(name)
+            source = CRAWL_SOURCES[name]
+            key = crawl_key(name, keyword)
+            produced = 0
+            with domain_semaphores[source.domain]:
+                options = dict(shared.get(name, {}), **source_options.get(name, {}))
+                page_iter = source.iter_pages(keyword, pages, start_pages.get(key, 0) + 1, limiter, **options)
+                try:
+                    for page, page_jobs in page_iter:
+                        page_jobs = [normalize_job(job, name) for job in page_jobs]
+                        produced += len(page_jobs)
+                        if not put((key, page, page_jobs)):
+                            break
+                except Exception as e:
+                    logging.error(f"{name} 爬取出错（关键词：{keyword}）: {e}")
+                finally:
+                    page_iter.close()
+            if produced or not source.fallback:
+                logging.info(f"{name} 爬取完成（关键词：{keyword}），共 {produced} 条")
+                break
+            logging.warning(f"{name} 没有爬取到岗位（关键词：{keyword}），改用备用数据源 {source.fallback}")
+            name = source.fallback
+
+    def task_done(future):
+        if future.exception() is not None:
+            logging.error(f"爬取任务异常结束: {future.exception()}")
+        put(done)
+
+    with ExitStack() as stack:
+        shared = {}
+        for name in involved:
+            source = CRAWL_SOURCES[name]
+            if source.resources is not None:
+                shared[name] = stack.enter_context(source.resources(domain_limit(source)))
+
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, max_workers)))
+        futures = []
+        for name in sources:
+            for keyword in keywords:
+                future = executor.submit(run_task, name, keyword, shared)
+                future.add_done_callback(task_done)
+                futures.append(future)
+
+        try:
+            remaining = len(futures)
+            while remaining:
+                item = results.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            # 提前结束（如写入出错）时通知所有任务停止，避免线程阻塞在队列上
+            stop.set()
+    limiter.log_metrics()
+
+
+# 并发爬取并返回所有岗位的列表
+def crawl_all(sources, keywords, pages=5, **kwargs):
+    all_jobs = [job for _, _, page_jobs in iter_crawl(sources, keywords, pages, **kwargs) for job in page_jobs]
+    logging.info(f"成功从 {'、'.join(sources)} 爬取 {len(all_jobs)} 条实习岗位信息")
+    return all_jobs
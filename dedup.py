@@ -0,0 +1,234 @@
+import pandas as pd
+import numpy as np
+import logging
+
+from storage import extract_posting_id
+from profiler import profiled, stage
+
+# 跨数据源去重与实体识别：
+# 1. 规范化 岗位名称/公司名称/薪资范围（全半角、大小写、标点、公司后缀等），规范化文本相同的岗位视为同一岗位，
+#    实习僧岗位ID相同的岗位也视为同一岗位；岗位ID不同的两个岗位不会被合并（不论文本是否相同或相似）
+# 2. 对每个不同的规范化文本分别计算岗位名称和公司名称的字符二元组MinHash签名，用LSH分桶找出候选，
+#    岗位名称和公司名称的估计Jaccard相似度都不低于阈值、且薪资相同（或一方缺失）时判定为近似重复
+# 3. 用连通分量合并所有重复关系得到重复簇，每个簇保留最后一条（最近一次爬取的）作为规范岗位；
+#    连通分量中出现多个岗位ID时，只对这些分量按ID约束重新合并
+# 除LSH分桶的排序外各步骤都是线性的，签名按块计算，数百万行数据也可以在内存中完成
+
+# 公司名称中不影响识别的地区前缀、行业词和公司后缀（如 "北京字节跳动科技有限公司" 规范化为 "字节跳动"）
+COMPANY_PREFIX_PATTERN = r'^(北京|上海|深圳|广州|杭州|成都|南京|武汉|西安|苏州|天津|重庆|厦门|长沙)(市)?'
+COMPANY_SUFFIX_PATTERN = (r'((科技|网络|信息|技术|软件|数据|智能|电子|文化|传媒|教育|咨询|管理|服务|金融|投资)+)?'
+                          r'(股份有限公司|有限责任公司|有限公司|集团|公司)?$')
+
+
+def normalize_title(titles):
+    """岗位名称：全角转半角、转小写、去掉括号中的地区等说明、空白和标点"""
+    return (titles.fillna('').astype(str).str.normalize('NFKC').str.lower()
+            .str.replace(r'[(（][^)）]*[)）]', '', regex=True)
+            .str.replace(r'[\W_]+', '', regex=True))
+
+
+def normalize_company(companies):
+    """公司名称：去掉括号中的地区等说明和公司后缀，其余同岗位名称"""
+    names = (companies.fillna('').astype(str).str.normalize('NFKC').str.lower()
+             .str.replace(r'[(（][^)）]*[)）]', '', regex=True)
+             .str.replace(r'[\W_]+', '', regex=True))
+    stripped = (names.str.replace(COMPANY_PREFIX_PATTERN, '', regex=True)
+                .str.replace(COMPANY_SUFFIX_PATTERN, '', regex=True))
+    # 全部是行业词的名称（如 "数据科技有限公司"）保留原样，避免规范化为空
+    return stripped.where(stripped != '', names)
+
+
+def normalize_salary(salaries):
+    """薪资范围：只保留数字（如 "150-200元/天" 和 "150-200/天" 都为 "150-200"）"""
+    return salaries.fillna('').astype(str).str.normalize('NFKC').str.findall(r'\d+').str.join('-')
+
+
+def _mix64(values):
+    """splitmix64：把整数打散成均匀分布的64位哈希（numpy无符号整数乘法按2^64取模）"""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+# 计算文本的MinHash签名（n × num_perm），以字符二元组为特征，全部为向量化运算
+def minhash_signatures(texts, num_perm=64, seed=1, chunk_size=50000):
+    texts = list(texts)
+    seeds = _mix64(np.arange(num_perm, dtype=np.uint64) + np.uint64(seed))
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for start in range(0, len(texts), chunk_size):
+        chunk = texts[start:start + chunk_size]
+        # 每个文本前后加分隔符，保证至少有一个二元组
+        padded = ['\x00' + text + '\x00' for text in chunk]
+        codes = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+        ends = np.cumsum(lengths)
+        # 二元组 = 前一个字符的码位 << 21 | 后一个字符的码位（码位小于2^21），去掉跨文本的二元组
+        bigrams = (codes[:-1] << np.uint64(21)) | codes[1:]
+        valid = np.ones(len(bigrams), dtype=bool)
+        valid[ends[:-1] - 1] = False
+        bigrams = bigrams[valid]
+        offsets = np.concatenate([[0], np.cumsum(lengths - 1)[:-1]])
+        for k in range(num_perm):
+            hashed = _mix64(bigrams ^ seeds[k])
+            signatures[start:start + len(chunk), k] = np.minimum.reduceat(hashed, offsets)
+    return signatures
+
+
+# LSH：签名分成 bands 段，任意一段完全相同的文本成为候选，与所在桶的第一个文本（代表）比较
+# verify(候选, 代表) 返回每对候选是否判定为重复；返回所有判定为重复的 (文本, 代表) 边
+def lsh_candidate_edges(signatures, verify, bands=16):
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    sources, targets = [], []
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, buckets = np.unique(keys, return_inverse=True)
+        buckets = buckets.ravel()
+        first = np.full(buckets.max() + 1, n, dtype=np.int64)
+        np.minimum.at(first, buckets, np.arange(n))
+        representative = first[buckets]
+        candidates = np.flatnonzero(representative != np.arange(n))
+        if not len(candidates):
+            continue
+        keep = verify(candidates, representative[candidates])
+        sources.append(candidates[keep])
+        targets.append(representative[candidates][keep])
+    if not sources:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+# 带岗位ID约束的连通分量，返回每行所属的分量编号
+# 合并单元为 (规范化文本, 岗位ID) 相同的行，没有ID的行按规范化文本合为一个单元；单元之间的边依次为：
+# ID相同、规范化文本相同、LSH判定的近似重复（连接两个文本各自的第一个单元）
+# 先不考虑约束求连通分量，只有含多个不同ID的分量才逐条边合并，并跳过会使分量中出现两个不同ID的边
+def _constrained_components(doc_of_row, id_of_row, doc_sources, doc_targets, n_docs):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n_ids = int(id_of_row.max()) + 2
+    unit_of_row, unit_keys = pd.factorize(doc_of_row.astype(np.int64) * n_ids + (id_of_row + 1))
+    unit_keys = np.asarray(unit_keys)
+    unit_doc = unit_keys // n_ids
+    unit_id = unit_keys % n_ids - 1
+    n_units = len(unit_keys)
+
+    def chain(groups):
+        """同一组内相邻单元之间的边"""
+        order = np.argsort(groups, kind='stable')
+        same = groups[order][1:] == groups[order][:-1]
+        return order[:-1][same], order[1:][same]
+
+    has_id = np.flatnonzero(unit_id >= 0)
+    id_edges = tuple(has_id[part] for part in chain(unit_id[has_id]))
+    doc_edges = chain(unit_doc)
+    first_unit = np.full(n_docs, -1, dtype=np.int64)
+    first_unit[unit_doc[::-1]] = np.arange(n_units)[::-1]
+    lsh_edges = (first_unit[doc_sources], first_unit[doc_targets])
+    edges = [id_edges, doc_edges, lsh_edges]
+
+    sources = np.concatenate([edge[0] for edge in edges])
+    targets = np.concatenate([edge[1] for edge in edges])
+    graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_units, n_units))
+    n_components, component = connected_components(graph, directed=False)
+
+    # 含两个及以上不同岗位ID的分量
+    ids = pd.DataFrame({'component': component[has_id], 'id': unit_id[has_id]})
+    conflicted = ids.groupby('component')['id'].nunique()
+    conflicted = conflicted.index[conflicted > 1].to_numpy()
+    if len(conflicted):
+        in_conflict = np.isin(component, conflicted)
+        parent = np.arange(n_units)
+        component_id = unit_id.copy()
+
+        def find(unit):
+            while parent[unit] != unit:
+                parent[unit] = parent[parent[unit]]
+                unit = parent[unit]
+            return unit
+
+        for source, target in zip(sources[in_conflict[sources]].tolist(), targets[in_conflict[sources]].tolist()):
+            root_a, root_b = find(source), find(target)
+            if root_a == root_b:
+                continue
+            id_a, id_b = component_id[root_a], component_id[root_b]
+            if id_a >= 0 and id_b >= 0 and id_a != id_b:
+                continue
+            parent[root_b] = root_a
+            component_id[root_a] = max(id_a, id_b)
+        units = np.flatnonzero(in_conflict)
+        roots = np.array([find(unit) for unit in units.tolist()], dtype=np.int64)
+        component[units] = n_components + roots
+    return component[unit_of_row]
+
+
+# 岗位去重：返回 (规范岗位DataFrame, 重复簇映射)
+# 重复簇映射以原数据的索引为索引，包含 簇ID（按首次出现的顺序编号）、规范行（该簇保留的行的索引）和 簇大小
+# threshold: 岗位名称和公司名称判定为近似重复的Jaccard相似度阈值
+# num_perm/bands: MinHash签名总长度（岗位名称和公司名称各一半）和LSH分段数
+@profiled()
+def dedup_postings(df, threshold=0.7, num_perm=64, bands=16):
+    if df.empty:
+        return df, pd.DataFrame({'簇ID': [], '规范行': [], '簇大小': []}, index=df.index)
+
+    title = normalize_title(df['岗位名称'])
+    company = normalize_company(df['公司名称'])
+    if '薪资范围' in df.columns:
+        salary = normalize_salary(df['薪资范围'])
+    else:
+        salary = pd.Series('', index=df.index)
+    keys = (title + '|' + company + '|' + salary).to_numpy(dtype=object)
+
+    # 规范化文本相同的行共用一个签名
+    doc_of_row, docs = pd.factorize(keys)
+    n_docs = len(docs)
+    first_row = np.full(n_docs, len(df), dtype=np.int64)
+    np.minimum.at(first_row, doc_of_row, np.arange(len(df)))
+    doc_salary = salary.to_numpy(dtype=object)[first_row]
+
+    # 岗位名称和公司名称各占一半签名，每个LSH分段中两者各占一半，只有两者都部分相同才会成为候选
+    half = num_perm // 2
+    rows = num_perm // bands
+    with stage('dedup_postings.MinHash签名'):
+        title_signatures = minhash_signatures(title.to_numpy(dtype=object)[first_row], num_perm=half, seed=1)
+        company_signatures = minhash_signatures(company.to_numpy(dtype=object)[first_row], num_perm=half, seed=2)
+    signatures = np.concatenate([
+        np.concatenate([title_signatures[:, band * rows // 2:(band + 1) * rows // 2],
+                        company_signatures[:, band * rows // 2:(band + 1) * rows // 2]], axis=1)
+        for band in range(bands)
+    ], axis=1)
+
+    def verify(candidates, representatives):
+        title_similarity = (title_signatures[candidates] == title_signatures[representatives]).mean(axis=1)
+        company_similarity = (company_signatures[candidates] == company_signatures[representatives]).mean(axis=1)
+        salary_a, salary_b = doc_salary[candidates], doc_salary[representatives]
+        same_salary = (salary_a == salary_b) | (salary_a == '') | (salary_b == '')
+        return (title_similarity >= threshold) & (company_similarity >= threshold) & same_salary
+
+    with stage('dedup_postings.LSH候选'):
+        sources, targets = lsh_candidate_edges(signatures, verify, bands=bands)
+
+    # 实习僧岗位ID：ID相同的行属于同一岗位，ID不同的两行一定不是同一岗位（即使规范化文本相同）
+    if '详情页URL' in df.columns:
+        id_of_row, _ = pd.factorize(df['详情页URL'].map(extract_posting_id).to_numpy(dtype=object))
+    else:
+        id_of_row = np.full(len(df), -1, dtype=np.int64)
+    component = _constrained_components(doc_of_row, id_of_row, sources, targets, n_docs)
+
+    # 簇按首次出现的顺序编号，每个簇保留最后一行
+    cluster, _ = pd.factorize(component)
+    positions = np.arange(len(df))
+    canonical = np.zeros(cluster.max() + 1, dtype=np.int64)
+    np.maximum.at(canonical, cluster, positions)
+    sizes = np.bincount(cluster)
+
+    clusters = pd.DataFrame({
+        '簇ID': cluster,
+        '规范行': df.index[canonical[cluster]],
+        '簇大小': sizes[cluster]
+    }, index=df.index)
+    canonical_df = df.iloc[np.sort(canonical)]
+    logging.info(f"去重：{len(df)} 条岗位合并为 {len(canonical_df)} 条，其中 {int((sizes > 1).sum())} 个重复簇")
+    return canonical_df, clusters
@@ -0,0 +1,203 @@
+import sys
+import time
+import importlib.util
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# HTML解析后端：实习僧列表页和详情页的字段提取
+# - html.parser：BeautifulSoup完整解析整个页面（原方式，作为对照）
+# - lxml：BeautifulSoup + lxml，配合SoupStrainer只解析岗位卡片和详情区域
+# - selectolax：基于C实现的解析器，最快
+# lxml 和 selectolax 为可选依赖，未安装时 get_parser 自动选择下一个可用的后端
+
+# 列表页：岗位卡片及其中的详情页链接
+LIST_ITEM_SELECTOR = '.intern-wrap.intern-item'
+LIST_LINK_SELECTOR = '.f-l.intern-detail__job a'
+
+# 详情页字段的选择器，skills 为多个元素，其余取第一个匹配元素的文本
+DETAIL_SELECTORS = {
+    'title': '.new_job_name',
+    'company': '.com_intro .com-name',
+    'salary': '.job_money.cutom_font',
+    'skills': '.job_good_list span',
+    'company_type': '.com-type',
+    'description': '.job_detail'
+}
+
+# 多行文本字段：各段文本去除首尾空白后按行拼接（其余字段直接拼接）
+MULTILINE_FIELDS = {'description'}
+
+# 部分解析时保留的区域（包含上面所有选择器的最外层元素的class）
+LIST_STRAIN_CLASSES = ['intern-item']
+DETAIL_STRAIN_CLASSES = ['new_job_name', 'com_intro', 'job_money', 'job_good_list', 'com-type', 'job_detail']
+
+
+# BeautifulSoup后端：features 为底层解析器，strain=True 时只解析需要的区域
+class SoupParser:
+    def __init__(self, features='html.parser', strain=False):
+        self.features = features
+        self.strain = strain
+        self.name = features if not strain else f'{features}+strainer'
+
+    def _soup(self, html, classes):
+        parse_only = None
+        if self.strain:
+            classes = set(classes)
+            # 多个class的元素（如 "intern-wrap intern-item"）按空格拆分后逐个匹配
+            parse_only = SoupStrainer(class_=lambda value: value is not None and not classes.isdisjoint(value.split()))
+        return BeautifulSoup(html, self.features, parse_only=parse_only)
+
+    def list_links(self, html):
+        """列表页中每个岗位卡片的详情页链接（原始href）"""
+        soup = self._soup(html, LIST_STRAIN_CLASSES)
+        links = []
+        for item in soup.select(LIST_ITEM_SELECTOR):
+            link = item.select_one(LIST_LINK_SELECTOR)
+            if link and 'href' in link.attrs:
+                links.append(link['href'])
+        return links
+
+    def detail_fields(self, html):
+        """详情页字段的文本，找不到的字段为None，skills 为列表"""
+        soup = self._soup(html, DETAIL_STRAIN_CLASSES)
+        fields = {}
+        for field, selector in DETAIL_SELECTORS.items():
+            if field == 'skills':
+                fields[field] = [item.get_text(strip=True) for item in soup.select(selector)]
+            else:
+                element = soup.select_one(selector)
+                separator = '\n' if field in MULTILINE_FIELDS else ''
+                fields[field] = element.get_text(separator, strip=True) if element else None
+        return fields
+
+
+# selectolax后端（Lexbor引擎）
+class SelectolaxParser:
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+
+    @staticmethod
+    def _text(node):
+        # 与BeautifulSoup的 get_text(strip=True) 一致：逐个文本节点去除首尾空白后直接拼接
+        return node.text(deep=True, separator='', strip=True)
+
+    @staticmethod
+    def _lines(node):
+        # 与BeautifulSoup的 get_text('\n', strip=True) 一致：去掉空白文本节点留下的空行
+        return '\n'.join(line for line in node.text(deep=True, separator='\n', strip=True).split('\n') if line)
+
+    def list_links(self, html):
+        tree = self._parser(html)
+        links = []
+        for item in tree.css(LIST_ITEM_SELECTOR):
+            link = item.css_first(LIST_LINK_SELECTOR)
+            if link is not None and 'href' in link.attributes:
+                links.append(link.attributes['href'])
+        return links
+
+    def detail_fields(self, html):
+        tree = self._parser(html)
+        fields = {}
+        for field, selector in DETAIL_SELECTORS.items():
+            if field == 'skills':
+                fields[field] = [self._text(item) for item in tree.css(selector)]
+            else:
+                element = tree.css_first(selector)
+                text = self._lines if field in MULTILINE_FIELDS else self._text
+                fields[field] = text(element) if element is not None else None
+        return fields
+
+
+PARSER_BACKENDS = {
+    'selectolax': SelectolaxParser,
+    'lxml': lambda: SoupParser('lxml', strain=True),
+    'html.parser': lambda: SoupParser('html.parser')
+}
+
+# 未指定后端时的优先顺序
+PARSER_PREFERENCE = ['selectolax', 'lxml', 'html.parser']
+
+
+# 各后端依赖的模块
+BACKEND_MODULES = {
+    'selectolax': 'selectolax.lexbor',
+    'lxml': 'lxml',
+    'html.parser': 'html.parser'
+}
+
+
+def _backend_available(name):
+    try:
+        return importlib.util.find_spec(BACKEND_MODULES[name]) is not None
+    except ImportError:
+        return False
+
+
+# 获取解析后端：name为None时按 PARSER_PREFERENCE 选择第一个已安装的后端
+def get_parser(name=None):
+    if name is not None:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"未知的解析后端: {name}")
+        if not _backend_available(name):
+            raise ImportError(f"解析后端 {name} 未安装")
+        return PARSER_BACKENDS[name]()
+    for candidate in PARSER_PREFERENCE:
+        if _backend_available(candidate):
+            return PARSER_BACKENDS[candidate]()
+    return SoupParser()
+
+
+def available_parsers():
+    return [name for name in PARSER_PREFERENCE if _backend_available(name)]
+
+
+# 对比各解析后端：在同一批HTML页面上检查输出是否与 html.parser 完全一致，并统计解析速度
+# kind 为 'list' 或 'detail'；返回每个后端一条记录 {后端, 页数, 耗时(秒), 每秒页数, 不一致页数}
+def compare_parsers(pages, kind='detail', backends=None, repeat=3):
+    pages = list(pages)
+    method = 'list_links' if kind == 'list' else 'detail_fields'
+    reference_parser = SoupParser('html.parser')
+    reference = [getattr(reference_parser, method)(html) for html in pages]
+
+    results = []
+    for name in backends or available_parsers():
+        parser = get_parser(name)
+        parse = getattr(parser, method)
+        outputs = [parse(html) for html in pages]
+        mismatches = sum(output != expected for output, expected in zip(outputs, reference))
+
+        best = float('inf')
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            for html in pages:
+                parse(html)
+            best = min(best, time.perf_counter() - start)
+        results.append({
+            '后端': parser.name,
+            '页数': len(pages),
+            '耗时(秒)': round(best, 4),
+            '每秒页数': round(len(pages) / best, 1) if best > 0 else float('inf'),
+            '不一致页数': mismatches
+        })
+        if mismatches:
+            logging.warning(f"解析后端 {parser.name} 有 {mismatches} 个页面的结果与 html.parser 不一致")
+    return results
+
+
+# 用法：python parsers.py list|detail 页面1.html 页面2.html ...
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3 or sys.argv[1] not in ('list', 'detail'):
+        print("用法: python parsers.py list|detail 页面1.html [页面2.html ...]")
+        sys.exit(1)
+    html_pages = []
+    for page_path in sys.argv[2:]:
+        with open(page_path, encoding='utf-8') as f:
+            html_pages.append(f.read())
+    for row in compare_parsers(html_pages, kind=sys.argv[1]):
+        print(row)
@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+import re
+import os
+import json
+import logging
+from functools import lru_cache
+
+from profiler import profiled
+
+# 数据清洗与预处理：岗位类别规则引擎、薪资标准化、技能拆分（技能标签 + 岗位描述中提取的技能）
+
+
+# 内置的岗位类别关键词，按优先级排列：岗位名称命中多个类别时取靠前的类别
+# 规则文件 岗位类别规则.json 不存在时使用
+JOB_CATEGORY_KEYWORDS = [
+    ('技术开发', ['Python', 'Java', 'C++', '前端', '后端', '全栈', '开发']),
+    ('数据/算法', ['数据', '分析', '算法', 'AI', '人工智能', '机器学习']),
+    ('产品', ['产品', 'PM', '产品经理']),
+    ('设计', ['设计', 'UI', 'UX', 'UI/UX']),
+    ('运营/市场', ['运营', '营销', '市场', '内容', '新媒体', '用户']),
+    ('人力资源', ['人力', 'HR', '招聘', '人事']),
+    ('财务/金融', ['财务', '会计', '金融']),
+]
+
+# 日薪换算月薪的工作天数
+WORK_DAYS_PER_MONTH = 22
+
+
+# 把关键词集合编译为前缀树形式的正则：在任一位置只需沿前缀树匹配一次即可得到最长命中的关键词，
+# 匹配代价与关键词长度相关，而不随关键词数量线性增长
+def _trie_regex(keywords):
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True  # 关键词结束标记
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # 当前前缀本身就是关键词：后续部分可选，贪婪匹配保证优先取最长关键词
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return build(trie)
+
+
+# 岗位类别规则引擎：所有类别的关键词编译成一个正则，一次扫描岗位名称即可按优先级确定类别，
+# 同时返回决定类别的关键词，便于核查分类结果
+class CategoryClassifier:
+    def __init__(self, rules, default='其他'):
+        """rules: [(类别, [关键词, ...]), ...]，按优先级从高到低排列"""
+        self.default = default
+        self.categories = [category for category, _ in rules]
+        priority = {}
+        for rank, (_, keywords) in enumerate(rules):
+            for keyword in keywords:
+                priority.setdefault(keyword, rank)
+
+        # 正则在每个位置只返回最长的关键词，而同一位置命中的其他关键词都是它的前缀，
+        # 所以预先为每个关键词算出它所有"关键词前缀"中优先级最高的一个
+        self._trigger = {}
+        for keyword in priority:
+            prefixes = [keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in priority]
+            best = min(prefixes, key=lambda prefix: priority[prefix])
+            self._trigger[keyword] = (priority[best], best)
+
+        # 前瞻断言使相互重叠的关键词也能在各自的起始位置被找到
+        self._pattern = re.compile('(?=(' + _trie_regex(priority) + '))') if priority else None
+
+    @classmethod
+    def from_file(cls, path):
+        """从JSON规则文件加载：{"default": "其他", "rules": [{"category": ..., "keywords": [...]}, ...]}"""
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        rules = [(rule['category'], rule['keywords']) for rule in config['rules']]
+        return cls(rules, default=config.get('default', '其他'))
+
+    def classify(self, title):
+        """对单个岗位名称分类，返回 (类别, 命中关键词)，未命中时关键词为None"""
+        best = None
+        if self._pattern is not None and isinstance(title, str):
+            for match in self._pattern.finditer(title):
+                candidate = self._trigger[match.group(1)]
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+        if best is None:
+            return self.default, None
+        return self.categories[best[0]], best[1]
+
+    def classify_series(self, titles):
+        """批量分类，返回与titles同索引的DataFrame，包含 岗位类别 和 类别关键词 两列"""
+        positions = titles.reset_index(drop=True)
+        result = pd.DataFrame({'岗位类别': self.default, '类别关键词': None}, index=positions.index)
+        if self._pattern is not None and len(positions):
+            hits = positions.fillna('').astype(str).str.findall(self._pattern).explode().dropna()
+            if not hits.empty:
+                trigger = hits.map(self._trigger)
+                hits = pd.DataFrame({
+                    'rank': trigger.map(lambda t: t[0]),
+                    'keyword': trigger.map(lambda t: t[1])
+                }, index=hits.index)
+                # 每行保留优先级最高的命中（稳定排序保证同优先级时取岗位名称中最先出现的关键词）
+                hits = hits.sort_values('rank', kind='stable')
+                hits = hits[~hits.index.duplicated(keep='first')]
+                result.loc[hits.index, '岗位类别'] = [self.categories[rank] for rank in hits['rank']]
+                result.loc[hits.index, '类别关键词'] = hits['keyword'].values
+        result.index = titles.index
+        return result
+
+
+# 加载岗位类别规则（结果缓存，规则只编译一次）；规则文件不存在时使用内置关键词
+@lru_cache(maxsize=None)
+def load_category_classifier(path="岗位类别规则.json"):
+    if os.path.exists(path):
+        return CategoryClassifier.from_file(path)
+    logging.warning(f"未找到岗位类别规则文件 {path}，使用内置规则")
+    return CategoryClassifier(JOB_CATEGORY_KEYWORDS)
+
+
+# 数据清洗与预处理（全部为向量化的列运算，避免逐行apply）
+# classifier: 岗位类别规则引擎，默认从 岗位类别规则.json 加载
+# skill_extraction=True 且有 岗位描述 列时，用jieba从描述中提取技能并入技能列表；skill_workers 为分词进程数
+@profiled()
+def preprocess_data(df, classifier=None, skill_extraction=True, skill_workers=None):
+    # 清洗岗位名称
+    df['岗位名称'] = df['岗位名称'].str.replace(r'[^\w\s\u4e00-\u9fff]+', '', regex=True)
+
+    # 从岗位名称中提取岗位类别，并记录决定类别的关键词
+    classifier = classifier or load_category_classifier()
+    categories = classifier.classify_series(df['岗位名称'])
+    df['岗位类别'] = categories['岗位类别']
+    df['类别关键词'] = categories['类别关键词']
+
+    # 处理薪资范围，统一格式并提取最低和最高薪资
+    # 取前两段数字作为最低/最高薪资，只有一段数字时最低=最高，没有数字（含"未公布"）时为空
+    salary = df['薪资范围'].astype(object)
+    numbers = salary.str.extract(r'(\d+)(?:\D+(\d+))?')
+    min_salary = numbers[0].astype(float)
+    max_salary = numbers[1].astype(float).fillna(min_salary)
+
+    # 判断单位，日薪转换为月薪（假设每月工作22天）
+    per_day = salary.str.contains('元/天|元/日', regex=True, na=False).to_numpy()
+    factor = np.where(per_day, WORK_DAYS_PER_MONTH, 1)
+    has_salary = min_salary.notna().to_numpy()
+
+    df['最低薪资'] = min_salary * factor
+    df['最高薪资'] = max_salary * factor
+    if has_salary.all():
+        # 与逐行处理时的结果类型保持一致：没有缺失值时为整数列
+        df['最低薪资'] = df['最低薪资'].astype('int64')
+        df['最高薪资'] = df['最高薪资'].astype('int64')
+    df['薪资单位'] = np.where(has_salary, np.where(per_day, '元/天', '元/月'), None)
+
+    # 计算平均薪资
+    df['平均薪资'] = (df['最低薪资'] + df['最高薪资']) / 2
+
+    # 提取技能要求
+    df['技能列表'] = df['技能要求'].str.split('[,，、 /]+')
+    if skill_extraction and '岗位描述' in df.columns:
+        merge_description_skills(df, workers=skill_workers)
+
+    return df
+
+
+# 从岗位描述中提取技能（描述技能 列），技能列表 为按技能词典规范化后的技能标签加上描述技能（去重）
+# 未安装jieba或没有技能词典时只保留技能标签
+def merge_description_skills(df, workers=None):
+    from skills import SKILL_DICT_PATH, SkillExtractor, extract_skills
+
+    if not os.path.exists(SKILL_DICT_PATH):
+        logging.warning(f"未找到技能词典 {SKILL_DICT_PATH}，跳过岗位描述的技能提取")
+        return df
+    try:
+        extracted = extract_skills(df['岗位描述'], workers=workers)
+    except ImportError:
+        logging.warning("未安装jieba，跳过岗位描述的技能提取")
+        return df
+
+    extractor = SkillExtractor()
+    df['描述技能'] = [', '.join(skills) for skills in extracted]
+    df['技能列表'] = [extractor.normalize((tags if isinstance(tags, list) else []) + skills)
+                      for tags, skills in zip(df['技能列表'], extracted)]
+    return df
+
@@ -0,0 +1,140 @@
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+# 流水线各阶段的耗时和内存统计
+# 用法：with stage('preprocess_data'): ... 或 @profiled('generate_report')
+# 默认关闭，关闭时 stage() 几乎没有开销；enable_profiling() 打开后记录每个阶段的调用次数、耗时，
+# track_memory=True 时用tracemalloc记录每个阶段的内存增量和（最外层阶段的）峰值内存
+# 多线程中的阶段（如并发抓取详情页）分别计时后累加，总耗时可能超过实际经过的时间
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+
+    def enable(self, track_memory=False):
+        self.enabled = True
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_memory = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        track_memory = self.track_memory and tracemalloc.is_tracing()
+        if track_memory:
+            if depth == 0:
+                tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.depth = depth
+            memory_delta = peak = None
+            if track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                memory_delta = current - memory_before
+                if depth > 0:
+                    peak = None  # 内层阶段的峰值包含外层已分配的内存，只记录最外层阶段的峰值
+            self._record(name, elapsed, memory_delta, peak)
+
+    def _record(self, name, elapsed, memory_delta, peak):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {
+                    'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                    'memory_delta_bytes': None, 'peak_memory_bytes': None
+                }
+            stats['calls'] += 1
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if memory_delta is not None:
+                stats['memory_delta_bytes'] = (stats['memory_delta_bytes'] or 0) + memory_delta
+            if peak is not None:
+                stats['peak_memory_bytes'] = max(stats['peak_memory_bytes'] or 0, peak)
+
+    def results(self):
+        """{阶段: {calls, total_seconds, mean_seconds, max_seconds, memory_delta_bytes, peak_memory_bytes}}，按记录顺序"""
+        with self._lock:
+            return {name: dict(stats, mean_seconds=stats['total_seconds'] / stats['calls'])
+                    for name, stats in self._stats.items()}
+
+    def to_json(self, path, **extra):
+        """把统计结果写入JSON文件，extra 中的字段（如数据规模）一并写入"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(extra, stages=self.results()), f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        """统计结果的文本表格"""
+        header = ['阶段', '调用次数', '总耗时(秒)', '平均(毫秒)', '最长(毫秒)', '内存增量(MB)', '峰值内存(MB)']
+
+        def megabytes(value):
+            return f"{value / 1024 / 1024:.1f}" if value is not None else '-'
+
+        rows = [[name, str(stats['calls']), f"{stats['total_seconds']:.3f}", f"{stats['mean_seconds'] * 1000:.1f}",
+                 f"{stats['max_seconds'] * 1000:.1f}", megabytes(stats['memory_delta_bytes']),
+                 megabytes(stats['peak_memory_bytes'])]
+                for name, stats in self.results().items()]
+
+        def width(text):
+            # 中文字符按两个字符宽度对齐
+            return sum(2 if ord(char) > 0x2E80 else 1 for char in text)
+
+        widths = [max(width(row[i]) for row in [header] + rows) for i in range(len(header))]
+        lines = []
+        for row in [header] + rows:
+            lines.append('  '.join(cell + ' ' * (widths[i] - width(cell)) for i, cell in enumerate(row)).rstrip())
+        lines.insert(1, '-' * len(lines[0]))
+        return '\n'.join(lines)
+
+
+# 全局统计器，各模块通过 stage() / profiled() 记录
+PROFILER = Profiler()
+
+
+def stage(name):
+    return PROFILER.stage(name)
+
+
+def profiled(name=None):
+    """装饰器：把整个函数作为一个阶段计时，name 默认为函数名"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with PROFILER.stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_profiling(track_memory=False):
+    PROFILER.reset()
+    PROFILER.enable(track_memory=track_memory)
+    return PROFILER
@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from analysis import SkillIndex
+from profiler import profiled
+
+# 岗位查询服务：由处理后数据预先构建索引，按 岗位类别、薪资区间、技能（全部包含）、公司 过滤并分页返回
+# - 薪资：全部岗位和每个岗位类别各一份按平均薪资排好序的数组，薪资区间用二分查找得到连续的一段
+# - 技能：技能倒排索引（analysis.SkillIndex），技能名不区分大小写
+# - 公司：公司名称 -> 岗位行号
+# 各条件得到的行号集合求交集后，按预先计算的薪资排名排序，只取当前页的行
+# 索引整体构建好后一次性替换，查询总是使用同一份完整的索引；数据文件变化后自动重新加载
+
+QUERY_COLUMNS = ['岗位名称', '公司名称', '公司类型', '岗位类别', '薪资范围', '平均薪资', '技能列表', '数据来源', '详情页URL']
+SORT_ORDERS = ('salary_desc', 'salary_asc', 'none')
+MAX_PAGE_SIZE = 100
+
+# 结果行号少于总行数的这一比例时直接排序，否则沿预先排好的顺序筛选
+_SORT_DIRECT_RATIO = 1 / 16
+
+
+class JobIndex:
+    @profiled('query.build_index')
+    def __init__(self, df, source=None):
+        self.source = source
+        self.loaded_at = time.time()
+        self.jobs = df[[column for column in QUERY_COLUMNS if column in df.columns]].reset_index(drop=True)
+        n = len(self.jobs)
+        self.salary = np.asarray(self.jobs['平均薪资'], dtype=float)
+        has_salary = ~np.isnan(self.salary)
+
+        # 按薪资升序排列的 (行号, 薪资)：全部岗位一份，每个岗位类别一份；薪资区间对应其中连续的一段
+        ascending = np.argsort(np.where(has_salary, self.salary, np.inf), kind='stable')[:int(has_salary.sum())]
+        self._salary_rows = {None: (ascending, self.salary[ascending])}
+        categories = np.asarray(self.jobs['岗位类别'], dtype=object)
+        category_of_ascending = pd.Series(categories[ascending])
+        for category, positions in category_of_ascending.groupby(category_of_ascending, sort=False).indices.items():
+            rows = ascending[np.sort(positions)]
+            self._salary_rows[category] = (rows, self.salary[rows])
+        self._category_rows = {category: np.sort(rows) for category, rows in
+                               pd.Series(categories).groupby(categories, sort=False).indices.items()}
+
+        # 排序方式 -> 按该顺序排列的全部行号，以及每行在该顺序中的位置（没有薪资的岗位排在最后）
+        unsalaried = np.flatnonzero(~has_salary)
+        self._orders = {'salary_asc': np.concatenate([ascending, unsalaried]),
+                        'salary_desc': np.concatenate([ascending[::-1], unsalaried])}
+        self._ranks = {}
+        for sort, order in self._orders.items():
+            self._ranks[sort] = np.empty(n, dtype=np.int64)
+            self._ranks[sort][order] = np.arange(n)
+
+        self.skill_index = SkillIndex(self.jobs['技能列表'])
+        self._skill_codes = {}
+        for code, skill in enumerate(self.skill_index.vocab):
+            self._skill_codes.setdefault(skill.lower(), []).append(code)
+
+        companies = self.jobs['公司名称'].astype(object).fillna('').astype(str).str.strip()
+        self._company_rows = {company: rows for company, rows in
+                              companies.groupby(companies.to_numpy(), sort=False).indices.items() if company}
+
+        # 结果行直接从按列的Python对象数组中取值，缺失值预先转换为None
+        self._values = {column: self.jobs[column].astype(object).where(self.jobs[column].notna(), None).to_numpy()
+                        for column in self.jobs.columns}
+
+    @classmethod
+    def from_path(cls, path):
+        """从处理后数据文件（CSV或Parquet数据集目录）构建索引"""
+        from storage import load_processed_data
+
+        return cls(load_processed_data(path), source=path)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def _skill_rows(self, skill):
+        codes = self._skill_codes.get(skill.strip().lower(), [])
+        postings = [self.skill_index.indices[self.skill_index.indptr[code]:self.skill_index.indptr[code + 1]]
+                    for code in codes]
+        if len(postings) == 1:
+            return postings[0]
+        return np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int64)
+
+    def query(self, category=None, min_salary=None, max_salary=None, skills=(), company=None,
+              sort='salary_desc', page=1, page_size=20):
+        """按条件查询岗位，薪资条件针对 平均薪资（元/月）、包含上下限，skills 须全部包含
+        返回 {'total': 命中数, 'page': 页码, 'page_size': 每页条数, 'results': [岗位, ...]}"""
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"未知的排序方式: {sort}（可选 {', '.join(SORT_ORDERS)}）")
+        if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"页码须从1开始，每页条数须在1到{MAX_PAGE_SIZE}之间")
+        bounded = min_salary is not None or max_salary is not None
+
+        # 技能、公司（以及有其他条件时的岗位类别）各对应一个升序的行号数组
+        sets = [self._skill_rows(skill) for skill in skills]
+        if company is not None:
+            sets.append(self._company_rows.get(company.strip(), np.empty(0, dtype=np.int64)))
+        if category is not None and (sets or not bounded):
+            sets.append(self._category_rows.get(category, np.empty(0, dtype=np.int64)))
+
+        n = len(self.jobs)
+        if sets:
+            # 从最小的集合开始，用二分查找逐个求交集
+            sets.sort(key=len)
+            rows = sets[0]
+            for other in sets[1:]:
+                if not len(rows) or not len(other):
+                    rows = rows[:0]
+                    break
+                positions = np.minimum(np.searchsorted(other, rows), len(other) - 1)
+                rows = rows[other[positions] == rows]
+            if bounded:
+                salary = self.salary[rows]
+                rows = rows[(salary >= (min_salary if min_salary is not None else -np.inf))
+                            & (salary <= (max_salary if max_salary is not None else np.inf))]
+            if sort == 'none':
+                ordered = rows
+            elif len(rows) < n * _SORT_DIRECT_RATIO:
+                ordered = rows[np.argsort(self._ranks[sort][rows], kind='stable')]
+            else:
+                selected = np.zeros(n, dtype=bool)
+                selected[rows] = True
+                ordered = self._orders[sort][selected[self._orders[sort]]]
+        elif bounded:
+            # 只有薪资（和岗位类别）条件：结果就是薪资升序数组中二分查找得到的一段
+            ascending, salaries = self._salary_rows.get(category, (np.empty(0, dtype=np.int64), np.empty(0)))
+            start = np.searchsorted(salaries, min_salary, side='left') if min_salary is not None else 0
+            end = np.searchsorted(salaries, max_salary, side='right') if max_salary is not None else len(salaries)
+            ordered = ascending[start:end]
+            if sort == 'salary_desc':
+                ordered = ordered[::-1]
+            elif sort == 'none':
+                selected = np.zeros(n, dtype=bool)
+                selected[ordered] = True
+                ordered = np.flatnonzero(selected)
+        else:
+            ordered = np.arange(n) if sort == 'none' else self._orders[sort]
+
+        offset = (page - 1) * page_size
+        results = [{column: values[row] for column, values in self._values.items()}
+                   for row in ordered[offset:offset + page_size].tolist()]
+        return {'total': len(ordered), 'page': page, 'page_size': page_size, 'results': results}
+
+    def summary(self):
+        """索引概况：岗位数、各岗位类别的岗位数、技能数、公司数和加载时间"""
+        counts = {category: len(rows) for category, rows in self._category_rows.items()}
+        return {
+            'source': self.source,
+            'loaded_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.loaded_at)),
+            '岗位数': len(self.jobs),
+            '岗位类别': dict(sorted(counts.items(), key=lambda item: -item[1])),
+            '技能数': len(self.skill_index.vocab),
+            '公司数': len(self._company_rows)
+        }
+
+
+def _source_signature(path):
+    """数据文件（或数据集目录下全部文件）的修改时间和大小，用于判断是否需要重新加载
+    Parquet数据集正在写入（存在写入标记，或遍历时文件被删除）时返回None"""
+    from storage import DATASET_WRITING_MARKER
+
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    if os.path.exists(os.path.join(path, DATASET_WRITING_MARKER)):
+        return None
+    files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    try:
+        return tuple(sorted((name, os.stat(name).st_mtime_ns, os.stat(name).st_size) for name in files))
+    except FileNotFoundError:
+        return None
+
+
+def _load_index(path):
+    """加载完整的数据并构建索引，返回 (索引, 数据签名)；数据正在写入或加载期间被修改时返回None"""
+    signature = _source_signature(path)
+    if signature is None:
+        return None
+    try:
+        index = JobIndex.from_path(path)
+    except (OSError, ValueError):
+        # 加载期间文件被写入或删除导致的读取错误，等写入完成后再加载；否则是数据本身的问题
+        if _source_signature(path) != signature:
+            return None
+        raise
+    # 加载期间开始了新的写入（标记文件或数据文件有变化），读到的可能是写了一半的数据
+    if _source_signature(path) != signature:
+        return None
+    return index, signature
+
+
+# 查询服务：持有当前的索引，数据文件变化后在后台构建新索引再整体替换，
+# 正在进行的查询继续使用旧索引，加载失败时保留旧索引
+# Parquet数据集正在写入时不加载，等写入完成后的下一次检查再重新加载
+class QueryService:
+    def __init__(self, path, wait_interval=1.0):
+        self.path = path
+        self._reload_lock = threading.Lock()
+        loaded = _load_index(path)
+        while loaded is None:
+            logging.info(f"数据集 {path} 正在写入，等待写入完成后加载")
+            time.sleep(wait_interval)
+            loaded = _load_index(path)
+        self.index, self._signature = loaded
+        logging.info(f"已加载查询索引：{len(self.index)} 条岗位")
+
+    def reload(self, force=False):
+        """数据文件有变化（或 force=True）时重新构建索引，返回是否重新加载；数据正在写入时不加载"""
+        with self._reload_lock:
+            signature = _source_signature(self.path)
+            if signature is None or (not force and signature == self._signature):
+                return False
+            loaded = _load_index(self.path)
+            if loaded is None:
+                logging.info("数据文件正在写入，稍后重新加载查询索引")
+                return False
+            index, self._signature = loaded
+            self.index = index
+        logging.info(f"数据文件已更新，重新加载查询索引：{len(index)} 条岗位")
+        return True
+
+    def watch(self, interval=5.0):
+        """启动后台线程，每 interval 秒检查一次数据文件"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    logging.error(f"重新加载查询索引失败，继续使用当前索引: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    def query(self, **conditions):
+        return self.index.query(**conditions)
+
+    def summary(self):
+        return self.index.summary()
+
+
+def _parse_query(query_string):
+    """把URL查询参数转换为 JobIndex.query 的参数；skill 可以重复或用逗号分隔"""
+    params = parse_qs(query_string)
+
+    def single(name, convert=str):
+        if name not in params:
+            return None
+        try:
+            return convert(params[name][-1])
+        except ValueError:
+            raise ValueError(f"参数 {name} 的值无效: {params[name][-1]}")
+
+    skills = [skill for value in params.get('skill', []) for skill in value.split(',') if skill.strip()]
+    conditions = dict(category=single('category'), min_salary=single('min_salary', float),
+                      max_salary=single('max_salary', float), skills=skills, company=single('company'),
+                      sort=single('sort'), page=single('page', int), page_size=single('page_size', int))
+    return {name: value for name, value in conditions.items() if value is not None}
+
+
+# HTTP接口：
+#   GET  /jobs?category=数据/算法&min_salary=6000&skill=SQL&page=1&page_size=20   查询岗位
+#   GET  /stats                                                                  索引概况
+#   POST /reload                                                                 立即检查并重新加载数据文件
+def make_query_handler(service):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                if url.path == '/jobs':
+                    self._send_json(200, service.query(**_parse_query(url.query)))
+                elif url.path == '/stats':
+                    self._send_json(200, service.summary())
+                else:
+                    self._send_json(404, {'error': f"未知的路径: {url.path}"})
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+
+        def do_POST(self):
+            if urlsplit(self.path).path != '/reload':
+                self._send_json(404, {'error': f"未知的路径: {self.path}"})
+                return
+            try:
+                self._send_json(200, {'reloaded': service.reload(force=True)})
+            except Exception as e:
+                self._send_json(500, {'error': f"重新加载失败: {e}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+# 启动查询服务（阻塞直到 Ctrl+C），reload_interval 秒检查一次数据文件是否更新（0为不检查）
+def serve(path, host='127.0.0.1', port=8000, reload_interval=5.0):
+    service = QueryService(path)
+    if reload_interval:
+        service.watch(reload_interval)
+    server = ThreadingHTTPServer((host, port), make_query_handler(service))
+    server.daemon_threads = True
+    logging.info(f"查询服务已启动：http://{host}:{server.server_address[1]}/jobs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
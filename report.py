@@ -0,0 +1,176 @@
+import pandas as pd
+
+from analysis import SkillAggregates
+from profiler import profiled
+
+# 生成Markdown分析报告
+
+
+# 趋势分析部分：最近两个周期各类别平均薪资的变化和热门技能需求的变化，以及趋势图
+def trend_section(trends):
+    if trends is None or len(trends['category_salary']) < 2:
+        return ''
+    period_name = '周' if trends['period'] == 'week' else '日'
+    salary = trends['category_salary']
+    latest, previous = salary.index[-1], salary.index[-2]
+    salary_change = pd.DataFrame({
+        f'{previous}': salary.loc[previous], f'{latest}': salary.loc[latest],
+        '变化(%)': (salary.loc[latest] / salary.loc[previous] - 1) * 100
+    }).dropna().sort_values('变化(%)', ascending=False).round(2)
+    demand = trends['skill_demand']
+    demand_change = pd.DataFrame({
+        f'{previous}': demand.loc[previous], f'{latest}': demand.loc[latest],
+        '变化(%)': (demand.loc[latest] / demand.loc[previous] - 1) * 100
+    }).dropna().sort_values('变化(%)', ascending=False).round(2)
+
+    return f"""
+## 趋势分析（按{period_name}，共 {len(salary)} 个周期）
+
+各岗位类别平均薪资（元/月）的变化:
+{salary_change.to_string()}
+
+热门技能需求（平均每次爬取的岗位数）的变化:
+{demand_change.to_string()}
+
+![各岗位类别薪资趋势](各岗位类别薪资趋势.png)
+
+![热门技能需求趋势](热门技能需求趋势.png)
+"""
+
+
+# 生成报告
+@profiled()
+def generate_report(analysis_results, df):
+    # 岗位数量
+    job_count = len(df)
+
+    # 平均薪资
+    avg_salary = df['平均薪资'].mean()
+
+    # 最受欢迎的技能（出现频次最高的前10个），复用分析阶段的技能聚合结果
+    skill_aggregates = analysis_results.get('skill_aggregates')
+    if skill_aggregates is None:
+        skill_aggregates = SkillAggregates(df)
+    top_skills = skill_aggregates.skill_counts().most_common(10)
+
+    # 薪资最高的岗位类别
+    top_salary_category = analysis_results['salary_by_category'].index[0]
+
+    # 薪资最高的技能
+    if not analysis_results['skill_salary'].empty:
+        top_salary_skill = analysis_results['skill_salary']['技能'].iloc[0]
+        top_salary_skill_value = analysis_results['skill_salary']['平均薪资'].iloc[0]
+    else:
+        top_salary_skill = "无数据"
+        top_salary_skill_value = 0
+
+    # 生成报告
+    report = f"""
+# 实习岗位市场分析报告
+
+## 基本情况
+
+- 共分析了 {job_count} 个实习岗位
+- 实习岗位平均薪资: {avg_salary:.2f} 元/月
+
+## 岗位分布
+
+最热门的岗位类型:
+{analysis_results['job_category_counts'].head(5).to_string()}
+
+## 薪资分析
+
+薪资最高的岗位类别: {top_salary_category} ({analysis_results['salary_by_category'].iloc[0]:.2f} 元/月)
+
+## 技能需求分析
+
+### 最受欢迎的技能 (Top 10):
+"""
+
+    for skill, count in top_skills:
+        report += f"- {skill}: {count}次\n"
+
+    report += f"""
+### 薪资最高的技能: {top_salary_skill} ({top_salary_skill_value:.2f} 元/月)
+
+## 对大学生的建议
+
+根据分析结果，我们向大学生提出以下建议:
+
+1. **重点关注的技能领域**:
+"""
+
+    # 根据薪资和需求量提出建议
+    high_value_skills = analysis_results['skill_salary'].head(5)['技能'].tolist()
+    report += "   - 高薪技能: " + ", ".join(high_value_skills) + "\n"
+
+    high_demand_skills = [skill for skill, _ in top_skills[:5]]
+    report += "   - 高需求技能: " + ", ".join(high_demand_skills) + "\n\n"
+
+    report += """2. **针对不同岗位方向的技能储备**:
+"""
+
+    # 对于每个主要岗位类别，提供技能储备建议
+    for category, skills_counter in analysis_results['category_skills'].items():
+        if len(skills_counter) > 0:
+            top_cat_skills = [skill for skill, _ in skills_counter.most_common(5)]
+            report += f"   - {category}方向: {', '.join(top_cat_skills)}\n"
+
+    report += f"""
+3. **实习市场洞察**:
+   - 目前市场上技术开发类和数据/算法类岗位需求量大
+   - 互联网和人工智能领域的公司提供了较多的实习机会
+   - 提高核心技能的专业深度，同时培养通用软技能(如沟通能力、团队协作等)
+
+4. **差距解读与提升路径**:
+   - 学校教育与企业需求的差距主要体现在实践经验和前沿技术应用上
+   - 建议通过参与开源项目、参加技术竞赛、自学热门框架等方式提升实践能力
+   - 结合自身专业背景，选择1-2个热门技能进行深入学习和项目实践
+{trend_section(analysis_results.get('trends'))}
+## 总结
+
+当前实习市场对大学生技能要求逐渐多元化和专业化，既需要专业技能的深度，也需要良好的软技能支持。大学生应当根据自身兴趣和市场需求，有针对性地提升核心竞争力，以更好地适应就业市场的需求.
+"""
+
+    return report
+
+
+# 生成近似统计模式的报告（analysis_results 为 analyze_stream 的结果），各项统计附带误差范围
+@profiled()
+def generate_sketch_report(analysis_results):
+    quantiles = analysis_results['salary_quantiles']
+    rank_error = analysis_results['salary_rank_error']
+
+    report = f"""
+# 实习岗位市场分析报告（近似统计）
+
+## 基本情况
+
+- 共分析了 {analysis_results['job_count']} 个实习岗位
+- 实习岗位薪资中位数: {analysis_results['salary_median']:.2f} 元/月（秩误差约 ±{rank_error:.2%}）
+
+## 岗位分布
+
+最热门的岗位类型:
+{analysis_results['job_category_counts'].head(5).to_string()}
+
+## 薪资分析
+
+各岗位类别薪资分位数（元/月，按中位数降序，每个分位数的秩误差约 ±{rank_error:.2%}）:
+{quantiles.drop(columns='秩误差').round(2).to_string() if not quantiles.empty else '无数据'}
+
+## 技能需求分析
+
+### 最受欢迎的技能 (Top 10，估计频次不会偏小，以 {1 - analysis_results['skill_error_probability']:.1%} 的概率偏大不超过 {analysis_results['skill_error_bound']:.0f} 次):
+"""
+
+    for row in analysis_results['top_skills'].head(10).itertuples(index=False):
+        report += f"- {row.技能}: 约{row.估计频次}次（不少于{row.频次下界}次）\n"
+
+    report += """
+## 说明
+
+本报告使用流式近似统计生成：薪资分位数来自KLL草图，技能频次来自Count-Min草图，内存占用与岗位总数无关，
+适合累计数据量很大时使用；需要精确结果时请去掉 --sketch 参数。
+"""
+    return report
@@ -0,0 +1,262 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from analysis import sort_counts
+from profiler import profiled
+
+# 流式近似统计：数据按块单遍处理，内存占用固定，不随累计的岗位数增长
+# - KLLSketch：薪资分位数（各岗位类别一个），秩误差约 rank_error()
+# - CountMinSketch + HeavyHitters：技能频次的近似计数和高频技能，估计值不会偏小，偏大不超过 ε·N（概率 1-δ）
+# 各草图都可以合并，多次爬取或多个进程分别处理的结果可以相加
+
+
+# KLL分位数草图：第h层的元素代表 2^h 个原始值，某层超过容量时排序后随机保留奇数位或偶数位的元素升入上一层
+# k 越大越精确，内存约为 O(k·log(n/k))
+class KLLSketch:
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # 越低的层容量越小，最高层容量为k
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """加入一批数值（忽略缺失值）"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """合并另一个草图"""
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # 奇数个元素时保留一个在本层，其余两两压缩
+                keep, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+                # 层数增加后各层容量会变化，从头重新检查
+                level = 0
+                continue
+            level += 1
+
+    def _weighted(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(values), 2 ** level, dtype=np.int64)
+                                  for level, values in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """分位数（qs 为0到1之间的数组），草图为空时返回NaN"""
+        qs = np.asarray(qs, dtype=float)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.minimum(positions, len(items) - 1)]
+        # 0和1分位数使用精确的最小值和最大值
+        return np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, result))
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value):
+        """小于等于 value 的数值所占比例的估计"""
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted()
+        position = np.searchsorted(items, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+    def rank_error(self):
+        """归一化秩误差（99%置信度下的经验公式，与Apache DataSketches的KLL实现一致）"""
+        return 2.296 / self.k ** 0.9723
+
+    def __len__(self):
+        """草图中实际保存的元素个数"""
+        return sum(len(values) for values in self._levels)
+
+
+# Count-Min草图：depth 行 × width 列计数器，width = e/ε（取2的幂），depth = ln(1/δ)
+# 估计值 ≥ 真实值，且以概率 1-δ 不超过 真实值 + ε·N（N为计入的总次数）
+class CountMinSketch:
+    def __init__(self, epsilon=1e-4, delta=1e-3, seed=1):
+        self.epsilon = epsilon
+        self.delta = delta
+        self._bits = max(1, int(math.ceil(math.log2(math.e / epsilon))))
+        self.width = 1 << self._bits
+        self.depth = max(1, int(math.ceil(math.log(1 / delta))))
+        self.total = 0
+        self._table = np.zeros((self.depth, self.width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # 乘法移位哈希的参数（奇数乘数）
+        self._multipliers = rng.integers(1, 2 ** 63, self.depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, self.depth, dtype=np.uint64)
+
+    @staticmethod
+    def hash_tokens(tokens):
+        """字符串的64位哈希"""
+        return pd.util.hash_array(np.asarray(tokens, dtype=object))
+
+    def _columns(self, hashes, row):
+        return ((hashes * self._multipliers[row] + self._offsets[row]) >> np.uint64(64 - self._bits)).astype(np.int64)
+
+    def update(self, hashes, counts):
+        counts = np.asarray(counts, dtype=np.int64)
+        self.total += int(counts.sum())
+        for row in range(self.depth):
+            self._table[row] += np.bincount(self._columns(hashes, row), weights=counts,
+                                            minlength=self.width).astype(np.int64)
+
+    def estimate(self, hashes):
+        return np.min([self._table[row][self._columns(hashes, row)] for row in range(self.depth)], axis=0)
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min草图的参数不同，无法合并")
+        self._table += other._table
+        self.total += other.total
+        return self
+
+    def error_bound(self):
+        """估计值最多偏大的次数（概率 1-δ）"""
+        return self.epsilon * self.total
+
+
+# 高频项：Count-Min计数 + 估计频次最高的 capacity 个候选项
+class HeavyHitters:
+    def __init__(self, capacity=1000, epsilon=1e-4, delta=1e-3):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(epsilon, delta)
+        self._candidates = pd.Series(dtype=np.uint64)  # 候选项 -> 哈希
+
+    def update(self, tokens):
+        """计入一批项（可重复）"""
+        counts = pd.Series(tokens, dtype=object).value_counts(sort=False)
+        if counts.empty:
+            return
+        hashes = CountMinSketch.hash_tokens(counts.index)
+        self.sketch.update(hashes, counts.to_numpy())
+        batch = pd.Series(hashes, index=counts.index)
+        self._candidates = pd.concat([self._candidates, batch[~batch.index.isin(self._candidates.index)]])
+        self._prune()
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self._candidates = pd.concat([self._candidates,
+                                      other._candidates[~other._candidates.index.isin(self._candidates.index)]])
+        self._prune()
+        return self
+
+    def _prune(self):
+        if len(self._candidates) > self.capacity:
+            estimates = self.sketch.estimate(self._candidates.to_numpy(dtype=np.uint64))
+            keep = np.argsort(-estimates, kind='stable')[:self.capacity]
+            self._candidates = self._candidates.iloc[np.sort(keep)]
+
+    def top(self, n=20):
+        """估计频次最高的 n 项：项、估计频次（不会偏小）和 频次下界（概率 1-δ）"""
+        estimates = self.sketch.estimate(self._candidates.to_numpy(dtype=np.uint64))
+        result = pd.DataFrame({'技能': self._candidates.index, '估计频次': estimates})
+        result = result.sort_values('估计频次', ascending=False, kind='stable').head(n).reset_index(drop=True)
+        result['频次下界'] = np.maximum(result['估计频次'] - int(self.sketch.error_bound()), 0)
+        return result
+
+
+# 流式统计：逐块计入预处理后的数据（岗位类别、平均薪资、技能列表三列即可）
+# 岗位类别数很少，类别岗位数精确计数；薪资分位数和技能频次使用固定大小的草图
+class StreamingStats:
+    def __init__(self, k=200, epsilon=1e-4, delta=1e-3, capacity=1000, seed=None):
+        self.k = k
+        self.seed = seed
+        self.category_counts = Counter()
+        self.salary = KLLSketch(k, seed=seed)
+        self.salary_by_category = {}
+        self.skills = HeavyHitters(capacity, epsilon, delta)
+
+    def update(self, df):
+        categories = pd.Series(np.asarray(df['岗位类别'], dtype=object))
+        salary = np.asarray(df['平均薪资'], dtype=float)
+        self.category_counts.update(categories.value_counts(sort=False).to_dict())
+        self.salary.update(salary)
+        for category, positions in categories.groupby(categories, sort=False).indices.items():
+            if category not in self.salary_by_category:
+                self.salary_by_category[category] = KLLSketch(self.k, seed=self.seed)
+            self.salary_by_category[category].update(salary[positions])
+
+        skills = df['技能列表'][df['技能列表'].map(lambda items: isinstance(items, list))].explode().dropna()
+        skills = skills.astype(str).str.strip()
+        self.skills.update(skills[skills != ''].to_numpy())
+
+    def merge(self, other):
+        self.category_counts.update(other.category_counts)
+        self.salary.merge(other.salary)
+        for category, sketch in other.salary_by_category.items():
+            if category in self.salary_by_category:
+                self.salary_by_category[category].merge(sketch)
+            else:
+                self.salary_by_category[category] = sketch
+        self.skills.merge(other.skills)
+        return self
+
+    @property
+    def n(self):
+        return sum(self.category_counts.values())
+
+    def job_category_counts(self):
+        return sort_counts(pd.Series(self.category_counts, name='count', dtype='int64').rename_axis('岗位类别'))
+
+    def salary_quantiles(self, qs=(0.25, 0.5, 0.75, 0.9)):
+        """各岗位类别的薪资分位数（按中位数降序），列为 岗位数、有薪资岗位数、P25/P50/...、秩误差"""
+        rows = {}
+        for category, sketch in self.salary_by_category.items():
+            row = {'岗位数': self.category_counts[category], '有薪资岗位数': sketch.n}
+            row.update({f'P{round(q * 100)}': value for q, value in zip(qs, sketch.quantiles(qs))})
+            row['秩误差'] = sketch.rank_error()
+            rows[category] = row
+        result = pd.DataFrame.from_dict(rows, orient='index').rename_axis('岗位类别')
+        return result.sort_values('P50', ascending=False) if not result.empty else result
+
+    def top_skills(self, n=20):
+        return self.skills.top(n)
+
+
+# 单遍处理数据块的迭代器（如 storage.iter_processed_data），返回 StreamingStats
+@profiled()
+def stream_statistics(chunks, **options):
+    stats = StreamingStats(**options)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
@@ -0,0 +1,169 @@
+import os
+import re
+import glob
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from profiler import profiled
+
+# 从岗位描述中提取技能：按自定义技能词典（技能词典.txt）把描述中的词规范化为技能名称
+# - 英文单词整词匹配（不会从 "excellent" 中找出 Excel、从 "good" 中找出 Go）
+# - 中文部分用jieba分词后匹配，中英混合的技能名（如 "C语言"）用正则匹配
+# jieba词典（自带词典 + 中文技能词）合并后只在技能词典变化时重建一次，加载模型缓存在 cache_dir 中，
+# 之后每次启动（包括每个分词子进程）直接读取缓存，不再逐行解析词典
+# 大批量描述按块分给多个进程并行分词
+
+SKILL_DICT_PATH = "技能词典.txt"
+JIEBA_CACHE_DIR = ".jieba_cache"
+
+# 技能词在分词词典中的词频，保证技能词优先于普通词被切分出来
+SKILL_WORD_FREQ = 100000
+
+# 英文单词（含 C++、C#、Node.js 中的符号），以及连字符连接的单词（如 scikit-learn）
+ASCII_WORD_PATTERN = re.compile(r'[a-z0-9+#.]+(?:-[a-z0-9+#.]+)*')
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]+')
+
+
+def _word_kind(word):
+    """技能词的类型：'ascii'（纯英文）、'cjk'（不含英文字母和数字）或 'mixed'"""
+    if word.isascii():
+        return 'ascii'
+    return 'mixed' if re.search(r'[a-z0-9]', word) else 'cjk'
+
+
+# 读取技能词典：返回 {小写的名称或别名: 规范名称}
+def load_skill_aliases(path=SKILL_DICT_PATH):
+    aliases = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            names = [name.strip() for name in line.split('|') if name.strip()]
+            for name in names:
+                aliases[name.lower()] = names[0]
+    return aliases
+
+
+# 生成合并后的分词词典（jieba自带词典 + 中文技能词），文件名包含技能词和jieba版本的哈希，已存在时直接复用
+def build_skill_dictionary(aliases, cache_dir=JIEBA_CACHE_DIR):
+    import jieba
+
+    words = sorted(word for word in aliases if _word_kind(word) == 'cjk' and ' ' not in word)
+    digest = hashlib.sha1('\n'.join(words).encode('utf-8') + jieba.__version__.encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f'skill_dict_{digest}.txt')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # 技能词典变化后，旧的合并词典和对应的模型缓存不再使用
+    for stale in glob.glob(os.path.join(cache_dir, 'skill_dict_*.txt')) + glob.glob(os.path.join(cache_dir, '*.cache')):
+        os.remove(stale)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with jieba.get_dict_file() as source, open(temp_path, 'wb') as target:
+        target.write(source.read().rstrip(b'\n') + b'\n')
+        for word in words:
+            target.write(f'{word} {SKILL_WORD_FREQ} skill\n'.encode('utf-8'))
+    os.replace(temp_path, path)
+    logging.info(f"已生成技能分词词典 {path}（{len(words)} 个技能词）")
+    return path
+
+
+class SkillExtractor:
+    def __init__(self, dict_path=SKILL_DICT_PATH, cache_dir=JIEBA_CACHE_DIR):
+        self.dict_path = dict_path
+        self.cache_dir = cache_dir
+        self.aliases = load_skill_aliases(dict_path)
+        self._tokenizer = None
+        # 中英混合的技能名：前面不能紧接英文字母或数字（"abc语言" 不算 "C语言"）
+        mixed = sorted((word for word in self.aliases if _word_kind(word) == 'mixed'), key=len, reverse=True)
+        self._mixed_pattern = re.compile(
+            r'(?<![a-z0-9])(?:' + '|'.join(re.escape(word) for word in mixed) + ')') if mixed else None
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            import jieba
+
+            jieba.setLogLevel(logging.WARNING)
+            tokenizer = jieba.Tokenizer(build_skill_dictionary(self.aliases, self.cache_dir))
+            tokenizer.tmp_dir = self.cache_dir
+            tokenizer.initialize()
+            self._tokenizer = tokenizer
+        return self._tokenizer
+
+    def extract(self, text):
+        """一段描述中的技能（规范名称，按首次出现的顺序去重）"""
+        if not isinstance(text, str) or not text:
+            return []
+        # 词典中的技能词均为小写，先统一大小写；命中记为 (位置, 技能)，最后按位置排序
+        text = text.lower()
+        hits = []
+        for match in ASCII_WORD_PATTERN.finditer(text):
+            word = match.group().strip('.')
+            if word in self.aliases:
+                hits.append((match.start(), self.aliases[word]))
+            elif '-' in word:
+                # 连字符连接的单词不是技能名时，逐个单词匹配（如 "python-based"）
+                hits.extend((match.start(), self.aliases[part.strip('.')]) for part in word.split('-')
+                            if part.strip('.') in self.aliases)
+        # 中文部分用jieba分词（关闭HMM新词发现，只按词典切分）
+        for match in NON_ASCII_PATTERN.finditer(text):
+            offset = match.start()
+            for word in self.tokenizer.cut(match.group(), HMM=False):
+                if word in self.aliases:
+                    hits.append((offset, self.aliases[word]))
+                offset += len(word)
+        if self._mixed_pattern is not None:
+            hits.extend((match.start(), self.aliases[match.group()]) for match in self._mixed_pattern.finditer(text))
+
+        skills = []
+        for _, skill in sorted(hits, key=lambda hit: hit[0]):
+            if skill not in skills:
+                skills.append(skill)
+        return skills
+
+    def normalize(self, skills):
+        """把技能标签规范化为词典中的名称（不在词典中的保持原样），去掉空值和重复"""
+        normalized = []
+        for skill in skills if isinstance(skills, list) else []:
+            if not isinstance(skill, str) or not skill.strip():
+                continue
+            skill = self.aliases.get(skill.strip().lower(), skill.strip())
+            if skill not in normalized:
+                normalized.append(skill)
+        return normalized
+
+
+# 分词子进程：每个进程只加载一次分词词典（从缓存读取）
+_worker_extractor = None
+
+
+def _init_worker(dict_path, cache_dir):
+    global _worker_extractor
+    _worker_extractor = SkillExtractor(dict_path, cache_dir)
+    _worker_extractor.tokenizer
+
+
+def _extract_chunk(texts):
+    return [_worker_extractor.extract(text) for text in texts]
+
+
+# 批量提取技能：workers 为进程数（None为CPU核数，1为在当前进程串行），chunk_size 为每个任务的描述条数
+@profiled()
+def extract_skills(texts, dict_path=SKILL_DICT_PATH, cache_dir=JIEBA_CACHE_DIR, workers=None, chunk_size=500):
+    texts = list(texts)
+    if not texts:
+        return []
+    extractor = SkillExtractor(dict_path, cache_dir)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) <= chunk_size:
+        return [extractor.extract(text) for text in texts]
+
+    # 先在主进程中生成合并词典和模型缓存，子进程启动时直接读取缓存
+    extractor.tokenizer
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                             initargs=(dict_path, cache_dir)) as executor:
+        return [skills for chunk in executor.map(_extract_chunk, chunks) for skills in chunk]
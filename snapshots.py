@@ -0,0 +1,197 @@
+import json
+import sqlite3
+import logging
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from analysis import SkillAggregates
+from profiler import profiled
+
+# 按爬取时间分区的快照库（SQLite）：每次预处理后的岗位数据作为一个快照保存，
+# 写入快照的同一个事务中更新按天、按周汇总的 岗位类别 和 技能 统计（岗位数、薪资总和、薪资平方和等可加量），
+# 趋势查询只读取汇总表，一年的快照也只有几百行，毫秒级返回
+# 同一周期内有多次爬取时，同一个岗位会在每个快照中各计一次，因此趋势中的岗位数为周期内平均每次爬取的岗位数
+# 预处理后用 write_crawl 写入：每个快照只包含本次爬取的岗位（增量模式下为新增的岗位），而不是累计的全部历史
+
+PERIODS = ('day', 'week')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawled_at TEXT NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_rows (
+    snapshot_id INTEGER NOT NULL,
+    岗位名称 TEXT, 公司名称 TEXT, 公司类型 TEXT, 岗位类别 TEXT, 薪资范围 TEXT, 平均薪资 REAL,
+    技能列表 TEXT, 数据来源 TEXT, 详情页URL TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshot_rows_id ON snapshot_rows (snapshot_id);
+CREATE TABLE IF NOT EXISTS period_snapshots (
+    period TEXT NOT NULL, period_start TEXT NOT NULL, 快照数 INTEGER NOT NULL,
+    PRIMARY KEY (period, period_start)
+);
+CREATE TABLE IF NOT EXISTS category_rollup (
+    period TEXT NOT NULL, period_start TEXT NOT NULL, 岗位类别 TEXT NOT NULL,
+    岗位数 INTEGER NOT NULL, 薪资岗位数 INTEGER NOT NULL, 薪资总和 REAL NOT NULL, 薪资平方和 REAL NOT NULL,
+    PRIMARY KEY (period, period_start, 岗位类别)
+);
+CREATE TABLE IF NOT EXISTS skill_rollup (
+    period TEXT NOT NULL, period_start TEXT NOT NULL, 技能 TEXT NOT NULL,
+    岗位数 INTEGER NOT NULL, 出现次数 INTEGER NOT NULL, 薪资岗位数 INTEGER NOT NULL, 薪资总和 REAL NOT NULL,
+    PRIMARY KEY (period, period_start, 技能)
+);
+"""
+
+ROW_COLUMNS = ['岗位名称', '公司名称', '公司类型', '岗位类别', '薪资范围', '平均薪资', '技能列表', '数据来源', '详情页URL']
+
+
+def period_start(moment, period):
+    """时间所在周期的起始日期（周从周一开始）"""
+    date = moment.date()
+    if period == 'week':
+        date -= datetime.timedelta(days=date.weekday())
+    return date.isoformat()
+
+
+def _upsert(conn, table, keys, values, frame):
+    """把 frame 中的统计量累加到汇总表（主键冲突时相加）"""
+    columns = keys + values
+    placeholders = ', '.join('?' for _ in columns)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in values)
+    conn.executemany(
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+        f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}',
+        frame[columns].itertuples(index=False, name=None))
+
+
+class SnapshotStore:
+    def __init__(self, path="岗位快照.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @profiled('snapshots.write')
+    def write_snapshot(self, df, crawled_at=None):
+        """保存一次爬取的预处理后数据，并在同一事务中更新各周期的汇总，返回快照ID"""
+        crawled_at = crawled_at or datetime.datetime.now()
+        rows = pd.DataFrame({column: df[column] if column in df.columns else None for column in ROW_COLUMNS})
+        rows['技能列表'] = rows['技能列表'].map(
+            lambda skills: json.dumps(list(skills), ensure_ascii=False) if isinstance(skills, list) else None)
+        rows = rows.astype(object).where(rows.notna(), None)
+
+        # 快照内的类别统计和 类别×技能 统计，各周期共用
+        salary = np.asarray(df['平均薪资'], dtype=float)
+        categories = pd.DataFrame({'岗位类别': np.asarray(df['岗位类别'], dtype=object), '薪资': salary,
+                                   '薪资平方': salary ** 2}).groupby('岗位类别', sort=False).agg(
+            岗位数=('薪资', 'size'), 薪资岗位数=('薪资', 'count'), 薪资总和=('薪资', 'sum'), 薪资平方和=('薪资平方', 'sum')
+        ).reset_index()
+        skills = SkillAggregates(df).by_skill[['岗位数', '出现次数', '薪资岗位数', '薪资总和']].reset_index()
+
+        with self._conn:
+            cursor = self._conn.execute('INSERT INTO snapshots (crawled_at, row_count) VALUES (?, ?)',
+                                        (crawled_at.isoformat(timespec='seconds'), len(df)))
+            snapshot_id = cursor.lastrowid
+            self._conn.executemany(
+                f'INSERT INTO snapshot_rows (snapshot_id, {", ".join(ROW_COLUMNS)}) '
+                f'VALUES (?, {", ".join("?" for _ in ROW_COLUMNS)})',
+                ((snapshot_id, *row) for row in rows.itertuples(index=False, name=None)))
+            for period in PERIODS:
+                start = period_start(crawled_at, period)
+                _upsert(self._conn, 'period_snapshots', ['period', 'period_start'], ['快照数'],
+                        pd.DataFrame({'period': [period], 'period_start': [start], '快照数': [1]}))
+                _upsert(self._conn, 'category_rollup', ['period', 'period_start', '岗位类别'],
+                        ['岗位数', '薪资岗位数', '薪资总和', '薪资平方和'],
+                        categories.assign(period=period, period_start=start))
+                _upsert(self._conn, 'skill_rollup', ['period', 'period_start', '技能'],
+                        ['岗位数', '出现次数', '薪资岗位数', '薪资总和'],
+                        skills.assign(period=period, period_start=start))
+        logging.info(f"已保存快照 {snapshot_id}（{crawled_at:%Y-%m-%d %H:%M}，{len(df)} 条岗位）")
+        return snapshot_id
+
+    def write_crawl(self, df):
+        """只把上一个快照之后爬取的岗位（按 抓取时间）保存为新快照，快照时间为这些岗位中最晚的抓取时间
+        没有新爬取的岗位时（如没有重新爬取就再次预处理）不写入，返回None"""
+        if '抓取时间' not in df.columns:
+            return self.write_snapshot(df)
+        crawled = pd.to_datetime(df['抓取时间'], errors='coerce')
+        latest = self._conn.execute('SELECT MAX(crawled_at) FROM snapshots').fetchone()[0]
+        new = crawled.notna().to_numpy()
+        if latest is not None:
+            new &= (crawled > pd.Timestamp(latest)).to_numpy()
+        if not new.any():
+            logging.info("没有新爬取的岗位，跳过快照写入")
+            return None
+        return self.write_snapshot(df[new], crawled[new].max().to_pydatetime())
+
+    def snapshots(self):
+        """所有快照：快照ID、爬取时间、岗位数"""
+        return pd.read_sql_query('SELECT snapshot_id AS 快照ID, crawled_at AS 爬取时间, row_count AS 岗位数 '
+                                 'FROM snapshots ORDER BY snapshot_id', self._conn)
+
+    def load_snapshot(self, snapshot_id=None):
+        """读取某个快照的岗位数据（默认最新的快照）"""
+        if snapshot_id is None:
+            snapshot_id = self._conn.execute('SELECT MAX(snapshot_id) FROM snapshots').fetchone()[0]
+        df = pd.read_sql_query(f'SELECT {", ".join(ROW_COLUMNS)} FROM snapshot_rows WHERE snapshot_id = ?',
+                               self._conn, params=(snapshot_id,))
+        df['技能列表'] = df['技能列表'].map(lambda skills: json.loads(skills) if skills is not None else None)
+        return df
+
+    def _rollup(self, table, key, value_sql, period, since, until, keys):
+        if period not in PERIODS:
+            raise ValueError(f"未知的周期: {period}")
+        sql = (f'SELECT r.period_start AS 周期, r.{key} AS {key}, {value_sql} AS value '
+               f'FROM {table} r JOIN period_snapshots p USING (period, period_start) WHERE r.period = ?')
+        params = [period]
+        if since:
+            sql += ' AND r.period_start >= ?'
+            params.append(since)
+        if until:
+            sql += ' AND r.period_start <= ?'
+            params.append(until)
+        if keys is not None:
+            keys = list(keys)
+            sql += f' AND r.{key} IN ({", ".join("?" for _ in keys)})'
+            params.extend(keys)
+        frame = pd.read_sql_query(sql, self._conn, params=params)
+        return frame.pivot(index='周期', columns=key, values='value').sort_index()
+
+    def category_salary_trend(self, period='week', since=None, until=None, categories=None):
+        """各岗位类别每个周期的平均薪资（行为周期起始日期，列为岗位类别）"""
+        return self._rollup('category_rollup', '岗位类别', 'r.薪资总和 / NULLIF(r.薪资岗位数, 0)',
+                            period, since, until, categories)
+
+    def category_count_trend(self, period='week', since=None, until=None, categories=None):
+        """各岗位类别每个周期平均每次爬取的岗位数"""
+        return self._rollup('category_rollup', '岗位类别', 'CAST(r.岗位数 AS REAL) / p.快照数',
+                            period, since, until, categories)
+
+    def skill_demand_trend(self, skills=None, period='week', since=None, until=None, top=10):
+        """技能每个周期平均每次爬取的需求岗位数；skills 为None时取全部周期累计需求最多的 top 个技能"""
+        if skills is None:
+            skills = [skill for skill, in self._conn.execute(
+                'SELECT 技能 FROM skill_rollup WHERE period = ? GROUP BY 技能 ORDER BY SUM(岗位数) DESC LIMIT ?',
+                (period, top))]
+        return self._rollup('skill_rollup', '技能', 'CAST(r.岗位数 AS REAL) / p.快照数',
+                            period, since, until, skills)
+
+    def trends(self, period='week', since=None, until=None, top_skills=10):
+        """供分析和报告使用的趋势数据：各类别平均薪资、各类别岗位数和热门技能需求"""
+        return {
+            'period': period,
+            'category_salary': self.category_salary_trend(period, since, until),
+            'category_count': self.category_count_trend(period, since, until),
+            'skill_demand': self.skill_demand_trend(period=period, since=since, until=until, top=top_skills)
+        }
@@ -0,0 +1,338 @@
+import pandas as pd
+import numpy as np
+import re
+import os
+import ast
+import csv
+import json
+import sqlite3
+import logging
+import datetime
+
+# 数据存储：原始数据的流式写入器、爬取检查点、增量爬取用的岗位ID和去重，
+# 以及处理后数据的Parquet列式存储（按抓取日期和数据来源分区，需要安装pyarrow）
+
+
+# 从实习僧详情页URL中提取岗位ID（如 inn_qqnwleuda50o），无法识别时返回None
+def extract_posting_id(url):
+    if not isinstance(url, str):
+        return None
+    match = re.search(r'inn_\w+', url)
+    return match.group(0) if match else None
+
+
+# 读取已保存数据中的岗位ID集合，供增量爬取跳过已知岗位
+def load_known_postings(path="实习岗位原始数据.csv"):
+    if not os.path.exists(path):
+        return set()
+    df = pd.read_csv(path)
+    if '详情页URL' not in df.columns:
+        return set()
+    return set(df['详情页URL'].map(extract_posting_id).dropna())
+
+
+# 原始数据的列顺序，各数据源缺少的列留空
+RAW_COLUMNS = ['岗位名称', '公司名称', '公司类型', '薪资范围', '技能要求', '数据来源', '详情页URL', '岗位描述', '抓取时间']
+
+
+# 流式写入CSV：每批数据到达后立即追加并刷新到磁盘，表头只在新文件中写一次
+# 追加到旧版本的文件（缺少新增的列）时，先把文件改写为包含新列的表头，已有行的新列为空
+class CSVStreamWriter:
+    def __init__(self, path, append=False):
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        fieldnames = RAW_COLUMNS
+        if not write_header:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                existing = next(csv.reader(f))
+            missing = [column for column in RAW_COLUMNS if column not in existing]
+            fieldnames = existing + missing
+            if missing:
+                _rewrite_csv_header(path, fieldnames)
+                logging.info(f"{path} 缺少列 {', '.join(missing)}，已改写表头后继续追加")
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+
+    def write_batch(self, jobs):
+        self._writer.writerows(jobs)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _rewrite_csv_header(path, fieldnames):
+    """以新的列改写CSV文件（先写临时文件再替换），原有行中没有的列为空"""
+    temp_path = f'{path}.tmp'
+    with open(path, newline='', encoding='utf-8-sig') as source, \
+            open(temp_path, 'w', newline='', encoding='utf-8-sig') as target:
+        writer = csv.DictWriter(target, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(csv.DictReader(source))
+    os.replace(temp_path, path)
+
+
+# 流式写入SQLite：每批数据一个事务
+class SQLiteStreamWriter:
+    def __init__(self, path, append=False, table='jobs'):
+        self._table = table
+        self._conn = sqlite3.connect(path)
+        if not append:
+            self._conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        columns = ', '.join(f'"{col}" TEXT' for col in RAW_COLUMNS)
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+        # 旧版本的表缺少新增的列时补上
+        existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')}
+        for col in RAW_COLUMNS:
+            if col not in existing:
+                self._conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" TEXT')
+        self._conn.commit()
+
+    def write_batch(self, jobs):
+        names = ', '.join(f'"{col}"' for col in RAW_COLUMNS)
+        placeholders = ', '.join('?' for _ in RAW_COLUMNS)
+        self._conn.executemany(f'INSERT INTO "{self._table}" ({names}) VALUES ({placeholders})',
+                               [tuple(job.get(col) for col in RAW_COLUMNS) for job in jobs])
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+# 根据文件扩展名选择流式写入器（.db/.sqlite/.sqlite3 写入SQLite，其余写CSV）
+def open_stream_writer(path, append=False):
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteStreamWriter(path, append=append)
+    return CSVStreamWriter(path, append=append)
+
+
+# 爬取进度检查点：记录每个 数据源/关键词 最后一个已写入磁盘的页码，中断后可以从下一页继续
+class CrawlCheckpoint:
+    def __init__(self, path="爬取进度.json"):
+        self.path = path
+        self._state = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._state = json.load(f)
+
+    def last_page(self, key):
+        return self._state.get(key, 0)
+
+    def save(self, key, page):
+        self._state[key] = page
+        self._write()
+
+    def clear(self, key):
+        """爬取正常结束后清除该数据源的进度"""
+        self._state.pop(key, None)
+        if self._state:
+            self._write()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)  # 原子替换，避免写到一半中断导致检查点损坏
+
+
+# 流式管道：逐页把爬虫生成器的结果写入存储，每页落盘后更新检查点，返回写入的岗位数
+# page_iter 产出 (页码, 岗位列表)，或多个数据源合并时的 (检查点键, 页码, 岗位列表)
+def stream_to_storage(page_iter, writer, checkpoint=None, checkpoint_key=None):
+    total = 0
+    for item in page_iter:
+        if len(item) == 3:
+            key, page, page_jobs = item
+        else:
+            key = checkpoint_key
+            page, page_jobs = item
+        # 每个岗位记录自己的抓取时间，用于按抓取日期分区和趋势快照
+        crawled_at = datetime.datetime.now().isoformat(timespec='seconds')
+        for job in page_jobs:
+            if not job.get('抓取时间'):
+                job['抓取时间'] = crawled_at
+        writer.write_batch(page_jobs)
+        total += len(page_jobs)
+        if checkpoint is not None:
+            checkpoint.save(key, page)
+        source = f"{key} " if len(item) == 3 else ""
+        logging.info(f"{source}第{page}页已写入 {len(page_jobs)} 条，累计 {total} 条")
+    return total
+
+
+# 文件的修改时间（ISO格式，精确到秒），作为旧版本数据中没有抓取时间的岗位的抓取时间
+def file_crawl_time(path):
+    return datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+
+
+# 补上缺少的抓取时间（旧版本的原始数据没有这一列），default 为ISO格式的时间，默认为当前时间
+def fill_crawl_times(df, default=None):
+    default = default or datetime.datetime.now().isoformat(timespec='seconds')
+    if '抓取时间' not in df.columns:
+        df['抓取时间'] = default
+    else:
+        df['抓取时间'] = df['抓取时间'].mask(df['抓取时间'] == '').fillna(default)
+    return df
+
+
+# 重复的岗位：优先按实习僧岗位ID，没有ID的按 岗位名称+公司名称+数据来源，同一岗位除最后一条外都标记为重复
+def duplicated_jobs(df):
+    if '详情页URL' in df.columns:
+        key = df['详情页URL'].map(extract_posting_id)
+    else:
+        key = pd.Series(None, index=df.index, dtype=object)
+    fallback = df['岗位名称'].astype(str) + '|' + df['公司名称'].astype(str) + '|' + df['数据来源'].astype(str)
+    return key.fillna(fallback).duplicated(keep='last')
+
+
+# 按岗位去重（规则见 duplicated_jobs），重复时保留最后一条
+def dedup_jobs(df):
+    if df.empty:
+        return df
+    return df[~duplicated_jobs(df)].reset_index(drop=True)
+
+
+# 追加爬取后的原始数据去重：df 的最后 n_crawled 行为本次爬取的岗位
+# 返回 (去重后的数据, 爬取增量)，爬取增量为 (去重后的数据中本次爬取的行（布尔数组）, 被本次爬取的同一岗位替换掉的旧行)
+def dedup_appended_jobs(df, n_crawled):
+    crawled = np.arange(len(df)) >= len(df) - n_crawled
+    duplicated = duplicated_jobs(df).to_numpy()
+    return df[~duplicated].reset_index(drop=True), (crawled[~duplicated], df[duplicated & ~crawled])
+
+
+# Parquet分区列：抓取日期（YYYY-MM-DD）和数据来源
+PARTITION_COLUMNS = ['抓取日期', '数据来源']
+
+# 低基数的文本列以字典编码（pandas中为category类型）存储
+CATEGORICAL_COLUMNS = ['岗位类别', '公司类型', '薪资单位']
+
+SALARY_COLUMNS = ['最低薪资', '最高薪资', '平均薪资']
+
+# 写入Parquet数据集期间存在的标记文件（以 "_" 开头，读取数据集时会被忽略），
+# 写入会删除并重写分区，读取方（如查询服务）看到标记时应等待写入完成
+DATASET_WRITING_MARKER = '_写入中'
+
+
+def _parquet_schema(df):
+    """处理后数据的Arrow表结构：类别列为字典编码，薪资为float64，技能列表为原生list<string>，其余为字符串"""
+    import pyarrow as pa
+
+    fields = []
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        elif column in SALARY_COLUMNS:
+            fields.append(pa.field(column, pa.float64()))
+        elif column == '技能列表':
+            fields.append(pa.field(column, pa.list_(pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+# 将处理后的数据写入分区Parquet数据集（root/抓取日期=.../数据来源=.../*.parquet）
+# 每个岗位按自己的 抓取时间 分区（没有抓取时间的岗位使用 crawl_date，默认为今天），
+# 写入涉及的分区会被整体替换：增量模式下每次写入全部历史数据，各分区的内容不变，不会产生重复
+# 写入期间数据集根目录下存在 DATASET_WRITING_MARKER 标记文件
+def write_parquet_dataset(df, root="实习岗位数据集", crawl_date=None):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    frame = df.copy()
+    default_date = crawl_date or datetime.date.today().isoformat()
+    if '抓取时间' in frame.columns:
+        dates = pd.to_datetime(frame['抓取时间'], errors='coerce').dt.strftime('%Y-%m-%d')
+        frame['抓取日期'] = dates.fillna(default_date)
+    else:
+        frame['抓取日期'] = default_date
+    for column in CATEGORICAL_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].astype('category')
+    if '技能列表' in frame.columns:
+        frame['技能列表'] = frame['技能列表'].map(lambda skills: skills if isinstance(skills, list) else None)
+    for column in frame.columns:
+        if column not in CATEGORICAL_COLUMNS and column not in SALARY_COLUMNS and column != '技能列表':
+            frame[column] = frame[column].map(lambda value: None if pd.isna(value) else str(value))
+
+    table = pa.Table.from_pandas(frame, schema=_parquet_schema(frame), preserve_index=False)
+    os.makedirs(root, exist_ok=True)
+    marker = os.path.join(root, DATASET_WRITING_MARKER)
+    with open(marker, 'w', encoding='utf-8') as f:
+        f.write(str(os.getpid()))
+    ds.write_dataset(table, root, format='parquet',
+                     partitioning=ds.partitioning(table.select(PARTITION_COLUMNS).schema, flavor='hive'),
+                     existing_data_behavior='delete_matching',
+                     basename_template='part-{i}.parquet')
+    # 写入失败时保留标记：数据集可能不完整，读取方不应加载
+    os.remove(marker)
+    logging.info(f"已写入Parquet数据集 {root}（{len(frame)} 条）")
+
+
+# 读取Parquet数据集，只读取 columns 指定的列，filters 下推到分区和行组过滤
+# filters 可以是pyarrow表达式，也可以是 [('列', '操作符', 值), ...] 形式（多个条件为"与"关系）
+def load_parquet_dataset(root="实习岗位数据集", columns=None, filters=None):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    partitioning = ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]),
+                                   flavor='hive')
+    dataset = ds.dataset(root, format='parquet', partitioning=partitioning)
+    if isinstance(filters, list):
+        filters = pq.filters_to_expression(filters)
+    return _arrow_to_pandas(dataset.to_table(columns=columns, filter=filters))
+
+
+def _arrow_to_pandas(table):
+    """Arrow表（或记录批）转换为与预处理结果一致的DataFrame"""
+    df = table.to_pandas()
+    # 字典编码列的类别是各文件字典的并集，过滤后只保留实际出现的类别（避免统计中出现 "人力资源: 0" 这样的空类别）
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    if '技能列表' in df.columns:
+        # Arrow的list列转换为numpy数组，这里还原为与预处理结果一致的Python列表
+        df['技能列表'] = df['技能列表'].map(lambda skills: list(skills) if skills is not None else None)
+    return df
+
+
+# 读取处理后的数据：目录视为Parquet数据集（支持列裁剪和过滤条件），否则按CSV读取
+# CSV中的 技能列表 保存为列表的字符串形式，需要还原为列表
+def load_processed_data(path="实习岗位处理后数据.csv", columns=None, filters=None):
+    if os.path.isdir(path):
+        return load_parquet_dataset(path, columns=columns, filters=filters)
+    if filters:
+        raise ValueError("CSV数据不支持过滤条件，请使用Parquet数据集")
+    df = pd.read_csv(path, usecols=columns)
+    if '技能列表' in df.columns:
+        df['技能列表'] = df['技能列表'].map(lambda skills: ast.literal_eval(skills) if isinstance(skills, str) else skills)
+    return df
+
+
+# 分块读取处理后的数据，每次产出不超过 chunk_size 行的DataFrame，内存占用与数据总量无关
+# 参数与 load_processed_data 相同，用于流式统计等单遍处理
+def iter_processed_data(path="实习岗位处理后数据.csv", columns=None, filters=None, chunk_size=100000):
+    if os.path.isdir(path):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        partitioning = ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]),
+                                       flavor='hive')
+        dataset = ds.dataset(path, format='parquet', partitioning=partitioning)
+        if isinstance(filters, list):
+            filters = pq.filters_to_expression(filters)
+        for batch in dataset.to_batches(columns=columns, filter=filters, batch_size=chunk_size):
+            if batch.num_rows == 0:
+                continue
+            yield _arrow_to_pandas(batch)
+        return
+    if filters:
+        raise ValueError("CSV数据不支持过滤条件，请使用Parquet数据集")
+    for df in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+        if '技能列表' in df.columns:
+            df['技能列表'] = df['技能列表'].map(
+                lambda skills: ast.literal_eval(skills) if isinstance(skills, str) else skills)
+        yield df
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('scipy')
+
+from aggregates import AggregateState  # noqa: E402
+from storage import dedup_appended_jobs  # noqa: E402
+from Main import run_preprocess  # noqa: E402
+
+TITLES = ['Python开发实习生', '数据分析实习生', '产品经理实习生', 'UI设计实习生', '新媒体运营实习生', 'HR招聘实习生',
+          '财务实习生', '行政实习生']
+SKILLS = ['Python,SQL', 'Excel,SQL', 'Axure', 'Photoshop,Figma', '', 'Excel', 'Python,Excel', 'Java,Python']
+
+
+def make_jobs(start, count, crawled_at):
+    return pd.DataFrame({
+        '岗位名称': [TITLES[i % len(TITLES)] for i in range(start, start + count)],
+        '公司名称': [f'公司{i % 7}' for i in range(start, start + count)],
+        '公司类型': '民营',
+        '薪资范围': [f'{100 + i % 5 * 50}-{200 + i % 5 * 50}元/天' for i in range(start, start + count)],
+        '技能要求': [SKILLS[i % len(SKILLS)] for i in range(start, start + count)],
+        '数据来源': '实习僧',
+        '详情页URL': [f'https://www.shixiseng.com/intern/inn_{i:06d}' for i in range(start, start + count)],
+        '岗位描述': '',
+        '抓取时间': crawled_at
+    })
+
+
+def lagou_job(title, company, salary, crawled_at, url=''):
+    return pd.DataFrame({'岗位名称': [title], '公司名称': [company], '公司类型': ['民营'], '薪资范围': [salary],
+                         '技能要求': ['Python'], '数据来源': ['拉勾网' if not url else '实习僧'], '详情页URL': [url],
+                         '岗位描述': [''], '抓取时间': [crawled_at]})
+
+
+def assert_same_aggregates(state, expected):
+    assert len(state) == len(expected)
+    pd.testing.assert_frame_equal(state.categories.sort_index(), expected.categories.sort_index(), check_like=True)
+    pd.testing.assert_frame_equal(state.by_category.sort_index(), expected.by_category.sort_index(),
+                                  check_like=True)
+    pd.testing.assert_series_equal(state.skill_pairs.sort_index(), expected.skill_pairs.sort_index())
+    pd.testing.assert_series_equal(state.job_category_counts(), expected.job_category_counts())
+    assert state.skill_counts().most_common() == expected.skill_counts().most_common()
+
+
+# 增量爬取后只用爬取和去重得到的新增、删除岗位更新聚合状态，结果与从全部数据重新计算相同
+def test_crawl_delta_matches_full_recompute(tmp_path):
+    options = dict(processed_path=str(tmp_path / 'processed.csv'), dataset_path=None,
+                   duplicates_path=str(tmp_path / 'duplicates.csv'), snapshot_path=None, skill_extraction=False)
+    old = pd.concat([
+        make_jobs(0, 40, '2026-10-01T08:00:00'),
+        lagou_job('Java后端开发实习生', '北京星河科技有限公司', '200-300元/天', '2026-10-01T08:00:00'),
+        lagou_job('市场推广实习生', '上海云帆文化传媒有限公司', '150元/天', '2026-10-01T08:00:00'),
+    ], ignore_index=True)
+    state = AggregateState(str(tmp_path / 'state.sqlite3'))
+    state.update(run_preprocess(old.copy(), **options))
+
+    crawled = pd.concat([
+        make_jobs(40, 10, '2026-10-02T08:00:00'),
+        # 与旧的拉勾网岗位是同一岗位：去重时保留新岗位，旧岗位需要从聚合状态中撤销
+        lagou_job('Java后端开发实习生', '北京星河科技有限公司', '200-300元/天', '2026-10-02T08:00:00',
+                  url='https://www.shixiseng.com/intern/inn_999999'),
+        # 同一个拉勾网岗位重新爬取（薪资有变化），原始数据去重时替换旧行
+        lagou_job('市场推广实习生', '上海云帆文化传媒有限公司', '180元/天', '2026-10-02T08:00:00'),
+    ], ignore_index=True)
+    raw, crawl_delta = dedup_appended_jobs(pd.concat([old, crawled], ignore_index=True), len(crawled))
+    processed_df, (added, removed) = run_preprocess(raw, crawl_delta=crawl_delta, **options)
+
+    assert len(added) == len(crawled)
+    assert state.update(added=added, removed=removed) == (len(crawled), 2)
+
+    expected = AggregateState()
+    expected.update(processed_df)
+    assert_same_aggregates(state, expected)
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+pytest.importorskip('jieba')
+
+from skills import SkillExtractor  # noqa: E402
+
+DICT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '技能词典.txt')
+
+
+@pytest.fixture(scope='module')
+def extractor(tmp_path_factory):
+    return SkillExtractor(DICT_PATH, cache_dir=str(tmp_path_factory.mktemp('jieba_cache')))
+
+
+# 英文单词中包含技能别名时不能算作该技能
+@pytest.mark.parametrize('text', [
+    'excellent communication', 'product sense', 'we prefer', 'good', 'google', 'algorithm', 'category',
+    'english', 'https://example.com', 'mobile apps', 'scalable systems', 'swiftly', 'pythonic code',
+])
+def test_no_substring_matches(extractor, text):
+    assert extractor.extract(text) == []
+
+
+def test_whole_word_and_chinese_matches(extractor):
+    text = "熟练使用Python、SQL和C++，了解Node.js、Vue3、scikit-learn，会用PS、Excel做数据可视化，掌握C语言，python-based"
+    assert extractor.extract(text) == ['Python', 'SQL', 'C++', 'Node.js', 'Vue', 'scikit-learn', 'Photoshop',
+                                       'Excel', '数据可视化', 'C语言']
+
+
+def test_case_insensitive_aliases(extractor):
+    assert extractor.extract('Experience with GOLANG, k8s and PyTorch.') == ['Go', 'Kubernetes', 'PyTorch']